@@ -9,62 +9,40 @@
 # - Predict a single career outcome for each player, but predict
 #   by using the probability that each player falls into 
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+import sys
 from collections import Counter
 
-# Build a simple predictive model (e.g., Logistic Regression)
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score
-from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
-
-# Load and preprocess data
-player_stats = pd.read_csv('player_stats.csv')
-awards_data = pd.read_csv('awards_data.csv')
-
-# Filter data for players drafted in or before the 2015 season
-train_data = player_stats[player_stats['draftyear'] <= 2015].copy()
-
-# Merge player stats and awards data
-merged_data = pd.merge(train_data, awards_data, on=['season', 'nbapersonid'], how='left')
-
-# Define a function to determine career outcome based on provided criteria
-def get_career_outcome(row):
-    seasons_after_first_four = merged_data[
-        (merged_data['nbapersonid'] == row['nbapersonid']) &
-        (merged_data['season'] > row['draftyear'] + 3) &
-        (merged_data['season'] >= 2015) & (merged_data['season'] <= 2021)
-    ]
-    
-    elite = seasons_after_first_four[seasons_after_first_four[['All NBA First Team', 'All NBA Second Team', 'All NBA Third Team', 'Most Valuable Player_rk']].any(axis=1) |
-                                  seasons_after_first_four['Defensive Player Of The Year_rk'].eq(1)]
-    
-    all_star = seasons_after_first_four[seasons_after_first_four['all_star_game'] == 'TRUE']
-    
-    starter = seasons_after_first_four[(seasons_after_first_four['games'] >= round(41 * (82/72))) |
-                                       (seasons_after_first_four['mins'] >= round(2000 * (82/72)))]
-    
-    rotation = seasons_after_first_four[seasons_after_first_four['mins'] >= round(1000 * (82/72))]
-    
-    # Determine the player's best career outcome after the first four years
-    if len(elite) >= 1:
-        return 'Elite'
-    elif len(all_star) >= 2:
-        return 'All-Star'
-    elif len(starter) >= 2:
-        return 'Starter'
-    elif len(rotation) >= 2:
-        return 'Rotation'
-    elif len(seasons_after_first_four) >= 2:
-        return 'Roster'
-    else:
-        return 'Out of the League'
-
-# Apply the get_career_outcome function to create the target variable
-train_data['career_outcome'] = train_data.apply(get_career_outcome, axis=1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from okc_analysis.incremental import refreshed_results
+from okc_analysis.instrument import stage
+from okc_analysis.loader import load_datasets
+from okc_analysis.model import load_or_train, score_players, training_data
+from okc_analysis.normalization import load_season_lengths
+from okc_analysis.outcomes import OUTCOME_ORDER
+from okc_analysis.report import write_predictions
+from okc_analysis.render import parse_script_args, show, wants_chart
+
+parse_script_args('Career outcome probabilities of the 2018-2021 draft classes')
+
+# Load and preprocess data (from the columnar cache, rebuilt whenever a CSV changes)
+with stage('load') as trace:
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data')
+
+    # Schedule length of every season, so the lockout and shortened seasons are rescaled to 82 games
+    season_lengths = load_season_lengths()
+    trace['rows'] = len(player_stats)
+
+# One feature vector per player from their first four seasons (saved between runs and
+# recomputed only for players whose rows changed)
+with stage('features') as trace:
+    features = refreshed_results()['player_features']
+    trace['rows'] = len(features)
+
+# Label players drafted in 2007-2015 with their career outcome (the target variable)
+with stage('classify') as trace:
+    train_data = training_data(player_stats, awards_data, features, season_lengths=season_lengths)
+    trace['rows'] = len(train_data)
 
 # Display a summary of the career outcomes
 career_outcomes_summary = Counter(train_data['career_outcome'])
@@ -78,107 +56,57 @@ print(f"Rotation: {career_outcomes_summary.get('Rotation', 0)}")
 print(f"Roster: {career_outcomes_summary.get('Roster', 0)}")
 print(f"Out of the League: {career_outcomes_summary.get('Out of the League', 0)}")
 
-
-# Update the features list based on the available columns
-features = ['mins', 'fgm', 'fga', 'fgp', 'fgm3', 'fga3', 'fgp3']  # Adjust this list based on your available columns
-target = 'career_outcome'
-
-# Split data into features (X) and target (y)
-X = train_data[features]
-y = train_data[target]
-
-# Split data into train and test sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Impute missing values and scale the data
-imputer = SimpleImputer(strategy='mean')
-X_train_imputed = imputer.fit_transform(X_train)
-X_test_imputed = imputer.transform(X_test)
-
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train_imputed)
-X_test_scaled = scaler.transform(X_test_imputed)
-
-# Initialize and train the model
+# Load the saved model (imputer, scaler and logistic regression), training and
+# saving it only when there is no artifact yet or the data has changed
 total_players = player_stats['player'].nunique()
-model = LogisticRegression(max_iter=total_players, random_state=42)
-model.fit(X_train_scaled, y_train)
-
-# Predict career outcomes on the test set
-y_pred = model.predict(X_test_scaled)
-
-# Evaluate the model's accuracy
-accuracy = accuracy_score(y_test, y_pred)
-print(f"\nModel Accuracy: {accuracy:.2%}")
-
-# Filter data for players drafted in 2018-2021
-test_data = player_stats[player_stats['draftyear'].isin(range(2018, 2022))].copy()
-
-# Select features for the test data
-X_test = test_data[features]
-
-# Predict career outcomes for test data
-X_test_imputed = imputer.transform(X_test)
-X_test_scaled = scaler.transform(X_test_imputed)
-test_predictions = model.predict(X_test_scaled)
-test_predictions_proba = model.predict_proba(X_test_scaled)
-
-# Convert predictions to a DataFrame
-predictions_df = pd.DataFrame({'Player': test_data['player'], 'Predicted Outcome': test_predictions})
-
-# Drop duplicates from the DataFrame (keep only the first occurrence of each player)
-predictions_df = predictions_df.drop_duplicates(subset='Player', keep='first')
-
-# Convert DataFrame to HTML table with a CSS class for hiding duplicates
-predictions_table_html = predictions_df.to_html(index=False, classes='hide-duplicates')
-
-# Print a success message
-print("Predictions table generated successfully.")
-
-# Define the full file path for the HTML predictions table
-predictions_table_path = 'Part1/OpenEndedModelingQuestion/predictions_table.html'
+with stage('fit') as trace:
+    model_artifact = load_or_train(player_stats, awards_data, features, season_lengths, max_iter=total_players)
+    trace['rows'] = len(train_data)
+
+# Evaluate the model's accuracy (measured on the 20% holdout when it was trained)
+print(f"\nModel Accuracy: {model_artifact['accuracy']:.2%}")
+
+# Score every player drafted in 2018-2021 in one call, with the probability of every outcome
+with stage('predict') as trace:
+    predictions = score_players(features, draft_years=range(2018, 2022), artifact=model_artifact)
+    trace['rows'] = len(predictions)
+
+# One row per player with the probability of every outcome
+predictions_df = predictions[['player', 'draftyear', 'draftpick', 'predicted_outcome'] + OUTCOME_ORDER].rename(
+    columns={'player': 'Player', 'draftyear': 'Draft Year', 'draftpick': 'Draft Pick', 'predicted_outcome': 'Predicted Outcome'})
+
+# Regenerate the HTML/CSV/JSON lines reports (written atomically, and only when the predictions changed)
+predictions_table_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'predictions_table')
+with stage('report') as trace:
+    saved = write_predictions(predictions_df, predictions_table_path, probability_columns=OUTCOME_ORDER)
+    trace['rows'] = len(predictions_df)
+if saved:
+    print("Predictions table saved successfully.")
+else:
+    print("Predictions table is already up to date.")
 
-# Initialize a set to keep track of processed players
-seen_players = set()
+# Print predictions for selected players
+selected_players = ['Shai Gilgeous-Alexander', 'Zion Williamson', 'James Wiseman', 'Josh Giddey']
+print("\n------- Sample Outputs -------")
 
-# Open the existing HTML file in append mode
-with open(predictions_table_path, 'a', encoding='utf-8') as f:
-    # Write the new predictions HTML table to the file
-    f.write(predictions_table_html)
+for _, row in predictions[predictions['player'].isin(selected_players)].iterrows():
+    probabilities = ', '.join(f"{outcome}: {row[outcome] * 100:.2f}%" for outcome in OUTCOME_ORDER)
+    print(f"\n{row['player']}: Predicted Outcome - {row['predicted_outcome']}, Probabilities - [{probabilities}]")
 
-    # Print a success message
-    print("Predictions table saved successfully.")
+# Only the chart is left: stop before matplotlib / seaborn are imported on a --text-only run,
+# or when the saved chart was drawn from the same data
+if not wants_chart('open_minded_outcomes', career_outcomes_summary):
+    sys.exit()
 
-    # Print predictions for selected players
-    selected_players = ['Shai Gilgeous-Alexander', 'Zion Williamson', 'James Wiseman', 'Josh Giddey']
-    print("\n------- Sample Outputs -------")
-
-    for player, prediction, probabilities in zip(test_data['player'], test_predictions, test_predictions_proba):
-        if player in selected_players and player not in seen_players:
-            seen_players.add(player)
-            elite_prob = f"{probabilities[0] * 100:.2f}%"
-            all_star_prob = f"{probabilities[1] * 100:.2f}%"
-            starter_prob = f"{probabilities[2] * 100:.2f}%"
-            rotation_prob = f"{probabilities[3] * 100:.2f}%"
-            roster_prob = f"{probabilities[4] * 100:.2f}%"
-            out_of_league_prob = f"{(1 - sum(probabilities[:5])) * 100:.2f}%"
-            print(f"\n{player}: Predicted Outcome - {prediction}, Probabilities - [Elite: {elite_prob}, All-Star: {all_star_prob}, Starter: {starter_prob}, Rotation: {rotation_prob}, Roster: {roster_prob}, Out of the League: {out_of_league_prob}]")
-
-            # Append the player's information to the HTML table if not already present
-            if player not in seen_players:
-                seen_players.add(player)
-                if player in selected_players:
-                    # Add a CSS class to hide duplicate rows
-                    predictions_table_html += f"<tr class='duplicate'><td>{player}</td><td>{prediction}</td></tr>\n"
-                else:
-                    predictions_table_html += f"<tr><td>{player}</td><td>{prediction}</td></tr>\n"
+import matplotlib.pyplot as plt
+import seaborn as sns
 
 # Create a bar plot of predicted career outcomes
 plt.figure(figsize=(8, 6))
-sns.countplot(data=train_data, x='career_outcome', order=['Elite', 'All-Star', 'Starter', 'Rotation', 'Roster', 'Out of the League'])
+sns.countplot(data=train_data, x='career_outcome', order=OUTCOME_ORDER)
 plt.title('Distribution of Predicted Career Outcomes')
 plt.xlabel('Career Outcome')
 plt.ylabel('Count')
 plt.xticks(rotation=45)
 plt.tight_layout()
-plt.show()
\ No newline at end of file
+show(plt.gcf(), 'open_minded_outcomes', data=career_outcomes_summary)
\ No newline at end of file
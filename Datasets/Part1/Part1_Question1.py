@@ -5,54 +5,62 @@
 
 # Try to use Pandas, NumPy, Seaborn, and MatPlotLib
 
-import pandas as pd
-import matplotlib.pyplot as plt
+import os
+import sys
 #import seaborn as sns
-from matplotlib.widgets import CheckButtons
-
-# Load data
-players_stats = pd.read_csv("player_stats.csv")
-awards_data = pd.read_csv("awards_data.csv")
-
-# Filter data for the specified seasons (2007-2021)
-filter_stats = players_stats[(players_stats['season'] >= 2007) & (players_stats['season'] <= 2021)]
-
-# Identify players who made All-Star Game and All NBA teams
-all_star_players = awards_data[awards_data['all_star_game'] == 1]['nbapersonid']
-all_nba_1st_team_players = awards_data[awards_data['All NBA First Team'] == 1]['nbapersonid']
-all_nba_2nd_team_players = awards_data[awards_data['All NBA Second Team'] == 1]['nbapersonid']
-all_nba_3rd_team_players = awards_data[awards_data['All NBA Third Team'] == 1]['nbapersonid']
-
-# Filter player stats data to include only the identified players
-all_star_stats = filter_stats[filter_stats['nbapersonid'].isin(all_star_players)]
-all_nba_1st_team_stats = filter_stats[filter_stats['nbapersonid'].isin(all_nba_1st_team_players)]
-all_nba_2nd_team_stats = filter_stats[filter_stats['nbapersonid'].isin(all_nba_2nd_team_players)]
-all_nba_3rd_team_stats = filter_stats[filter_stats['nbapersonid'].isin(all_nba_3rd_team_players)]
 
-# Group player stats by 'nbapersonid' and 'season', and calculate the average points
-avg_points_all_star = all_star_stats.groupby(['season'])['points'].sum() / all_star_stats.groupby(['season'])['games'].sum()
-avg_points_1st_team = all_nba_1st_team_stats.groupby(['season'])['points'].sum() / all_nba_1st_team_stats.groupby(['season'])['games'].sum()
-avg_points_2nd_team = all_nba_2nd_team_stats.groupby(['season'])['points'].sum() / all_nba_2nd_team_stats.groupby(['season'])['games'].sum()
-avg_points_3rd_team = all_nba_3rd_team_stats.groupby(['season'])['points'].sum() / all_nba_3rd_team_stats.groupby(['season'])['games'].sum()
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from okc_analysis.charts import add_line_toggles
+from okc_analysis.incremental import refreshed_results
+from okc_analysis.instrument import stage
+from okc_analysis.render import parse_script_args, show, wants_chart
+from okc_analysis.resampling import bootstrap_ci
+from okc_analysis.tiers import SCORING_TIERS, tier_per_game
+
+parse_script_args('Average points per game of the All-Star and All NBA teams, 2007-2021')
+
+# Points and games of every player in each tier's award seasons for the specified seasons (2007-2021),
+# totalled per season. The rows are saved between runs and only the seasons whose rows changed are recomputed.
+with stage('aggregate') as trace:
+    tier_players = refreshed_results()['tier_players'].loc[2007:2021]
+    tier_totals = tier_players.groupby(level=['season', 'tier']).sum()
+
+    # Calculate the average points per game for each tier and season
+    avg_points = tier_per_game(tier_totals, stats=['points'], tiers=SCORING_TIERS)['points']
+    trace['rows'] = len(avg_points)
+
+# 95% bootstrap intervals for every season and tier, and for the average over all seasons,
+# from 10,000 resamples of the same players' rows in each season and tier
+with stage('resample') as trace:
+    season_ci, overall_ci = bootstrap_ci(tier_players, ['season', 'tier'], 'points', 'games', overall='tier')
+    trace['rows'] = len(season_ci)
+avg_points_all_star = avg_points['All Star'].dropna()
+avg_points_1st_team = avg_points['1st Team'].dropna()
+avg_points_2nd_team = avg_points['2nd Team'].dropna()
+avg_points_3rd_team = avg_points['3rd Team'].dropna()
 
 # Display average points per game for each category in the terminal
 # Utilized zip as a way to align the season and average points to output on the same line and
 # have the lists/tuples correspond correctly while utilizing the csv files
 print("Average Points per Game for All-Star Players:")
-for season, avg_points in zip(avg_points_all_star.index, avg_points_all_star):
-    print(f"Season {season}: {avg_points:.2f}")
+for season, season_avg in zip(avg_points_all_star.index, avg_points_all_star):
+    lower, upper = season_ci.loc[(season, 'All Star'), ['lower', 'upper']]
+    print(f"Season {season}: {season_avg:.2f} (95% CI {lower:.2f}-{upper:.2f})")
 
 print("\nAverage Points per Game for All NBA First Team Players:")
-for season, avg_points in zip(avg_points_1st_team.index, avg_points_1st_team):
-    print(f"Season {season}: {avg_points:.2f}")
+for season, season_avg in zip(avg_points_1st_team.index, avg_points_1st_team):
+    lower, upper = season_ci.loc[(season, '1st Team'), ['lower', 'upper']]
+    print(f"Season {season}: {season_avg:.2f} (95% CI {lower:.2f}-{upper:.2f})")
 
 print("\nAverage Points per Game for All NBA Second Team Players:")
-for season, avg_points in zip(avg_points_2nd_team.index, avg_points_2nd_team):
-    print(f"Season {season}: {avg_points:.2f}")
+for season, season_avg in zip(avg_points_2nd_team.index, avg_points_2nd_team):
+    lower, upper = season_ci.loc[(season, '2nd Team'), ['lower', 'upper']]
+    print(f"Season {season}: {season_avg:.2f} (95% CI {lower:.2f}-{upper:.2f})")
 
 print("\nAverage Points per Game for All NBA Third Team Players:")
-for season, avg_points in zip(avg_points_3rd_team.index, avg_points_3rd_team):
-    print(f"Season {season}: {avg_points:.2f}")
+for season, season_avg in zip(avg_points_3rd_team.index, avg_points_3rd_team):
+    lower, upper = season_ci.loc[(season, '3rd Team'), ['lower', 'upper']]
+    print(f"Season {season}: {season_avg:.2f} (95% CI {lower:.2f}-{upper:.2f})")
 
 # Calculate the total average for all seasons combined
 total_avg_all_star = avg_points_all_star.mean()
@@ -66,6 +74,17 @@ print("Total Average Points per Game for 2nd Team: {:.2f}".format(total_avg_2nd_
 print("Total Average Points per Game for 3rd Team: {:.2f}".format(total_avg_3rd_team))
 print("Total Average Points per Game for All-Star: {:.2f}".format(total_avg_all_star))
 
+print("\n95% bootstrap intervals of the total averages:")
+for tier, interval in overall_ci.iterrows():
+    print("{}: {:.2f} - {:.2f}".format(tier, interval['lower'], interval['upper']))
+
+# Only the chart is left: stop before matplotlib is imported on a --text-only run,
+# or when the saved chart was drawn from the same data
+if not wants_chart('part1_question1', avg_points):
+    sys.exit()
+
+import matplotlib.pyplot as plt
+
 # Create a figure and axis for the plot
 plt.figure(figsize=(10, 6))
 ax = plt.gca()
@@ -88,23 +107,7 @@ ax.legend(loc='upper left')
 plt.tight_layout()
 
 # Create checkboxes to control visibility of distribution lines
-rax = plt.axes([0.85, 0.65, 0.1, 0.15])
-labels = ('All Star', '1st Team', '2nd Team', '3rd Team')
-visibility = [line_all_star.get_visible(), line_1st_team.get_visible(), line_2nd_team.get_visible(), line_3rd_team.get_visible()]
-check_buttons = CheckButtons(rax, labels, visibility)
-
-def func(label):
-    if label == 'All Star':
-        line_all_star.set_visible(not line_all_star.get_visible())
-    elif label == '1st Team':
-        line_1st_team.set_visible(not line_1st_team.get_visible())
-    elif label == '2nd Team':
-        line_2nd_team.set_visible(not line_2nd_team.get_visible())
-    elif label == '3rd Team':
-        line_3rd_team.set_visible(not line_3rd_team.get_visible())
-    plt.draw()  # Redraw the plot to reflect changes
-
-# Connect the CheckButtons to the function
-check_buttons.on_clicked(func)
-
-plt.show() # Used to display the GUI/graph
\ No newline at end of file
+lines = {'All Star': line_all_star, '1st Team': line_1st_team, '2nd Team': line_2nd_team, '3rd Team': line_3rd_team}
+check_buttons = add_line_toggles(plt.gcf(), lines, [0.85, 0.65, 0.1, 0.15])
+
+show(plt.gcf(), 'part1_question1', data=avg_points) # Used to display the GUI/graph (or save it when headless)
\ No newline at end of file
@@ -11,51 +11,47 @@
 
 # Try to use Pandas, NumPy, Seaborn, and MatPlotLib
 
+import os
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.widgets import CheckButtons
 
-# Load data
-players_stats = pd.read_csv("player_stats.csv")
-awards_data = pd.read_csv("awards_data.csv")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from okc_analysis.charts import add_line_toggles
+from okc_analysis.incremental import refreshed_results
+from okc_analysis.instrument import stage
+from okc_analysis.milestones import experience_by_first_season, first_milestone_years
+from okc_analysis.render import parse_script_args, show, wants_chart
+from okc_analysis.resampling import bootstrap_ci
+
+parse_script_args('Years of experience to a first All NBA selection')
+
+# First season every player reached each award tier (saved between runs and
+# recomputed only for players whose rows changed)
+with stage('join') as trace:
+    milestones = refreshed_results()['milestones']
+    trace['rows'] = len(milestones)
 
 # Filter players who were drafted in 2007 or later
-filtered_players_stats = players_stats[players_stats["draftyear"] >= 2007]
-
-# Create a dictionary to store the year of the first All NBA selection for each player
-first_all_nba_year = {}
-
-# Iterate through each row in the awards data
-for index, row in awards_data.iterrows():
-    player_id = row["nbapersonid"]
-    year = row["season"]
-    if (
-        (row["All NBA First Team"] == 1)
-        | (row["All NBA Second Team"] == 1)
-        | (row["All NBA Third Team"] == 1)
-    ):
-        if player_id not in first_all_nba_year:
-            first_all_nba_year[player_id] = year
-
-# Filter players who didn't win an All NBA selection
-filtered_players_stats = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(first_all_nba_year.keys())]
-
-# Calculate the years of experience for each player
-filtered_players_stats["first_all_nba_year"] = filtered_players_stats["nbapersonid"].map(first_all_nba_year)
-filtered_players_stats["years_of_experience"] = (
-    filtered_players_stats["first_all_nba_year"] - filtered_players_stats["draftyear"]
-)
-
-# Calculate the average number of years of experience to win the first All NBA selection
-average_years_to_first_all_nba = filtered_players_stats.groupby("first_all_nba_year")[
-    "years_of_experience"
-].mean()
-
-# Calculate the average years of experience for each All-NBA team (1st, 2nd, and 3rd teams)
-average_1st_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA First Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
-average_2nd_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA Second Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
-average_3rd_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA Third Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
+with stage('filter') as trace:
+    milestones = milestones[milestones["draftyear"] >= 2007]
+    trace['rows'] = len(milestones)
+
+# Calculate the average years of experience by the season each tier was first reached,
+# counting every player once per tier
+with stage('aggregate') as trace:
+    experience = experience_by_first_season(milestones)
+    trace['rows'] = len(experience)
+
+# 95% bootstrap intervals of the averages over all seasons, from 10,000 resamples of the
+# players who first reached each tier in each season
+with stage('resample') as trace:
+    _, overall_ci = bootstrap_ci(first_milestone_years(milestones), ['first_season', 'tier'],
+                                 'years_of_experience', overall='tier')
+    trace['rows'] = len(overall_ci)
+average_years_to_first_all_nba = experience["All NBA"].dropna()
+average_1st_team = experience["All NBA First Team"].dropna()
+average_2nd_team = experience["All NBA Second Team"].dropna()
+average_3rd_team = experience["All NBA Third Team"].dropna()
 
 # Display the result for each season
 print("Average number of years of experience to win first All NBA selection:\n")
@@ -74,6 +70,27 @@ for season in range(2007, 2022):
         season, avg_years_all_nba, avg_years_1st_team, avg_years_2nd_team, avg_years_3rd_team
     ))
 
+# Calculate and display the overall, 1st, 2nd and 3rd average
+overall_avg = average_years_to_first_all_nba.mean()
+
+print("\nOverall Average: {:.2f}".format(overall_avg))
+print("Average years of experience for 1st Team: {:.2f}".format(average_1st_team.mean()))
+print("Average years of experience for 2nd Team: {:.2f}".format(average_2nd_team.mean()))
+print("Average years of experience for 3rd Team: {:.2f}".format(average_3rd_team.mean()))
+
+# The same analysis for every other award tier comes out of the same call
+print("\nAverage years of experience to first reach each award tier (95% bootstrap interval):")
+for tier, avg_years in experience.mean().items():
+    print("{}: {:.2f} ({:.2f} - {:.2f})".format(tier, avg_years, overall_ci.loc[tier, 'lower'],
+                                                 overall_ci.loc[tier, 'upper']))
+
+# Only the chart is left: stop before matplotlib is imported on a --text-only run,
+# or when the saved chart was drawn from the same data
+if not wants_chart('part1_question2', experience):
+    sys.exit()
+
+import matplotlib.pyplot as plt
+
 # Visualize the distribution of years of experience
 # plt.figure(figsize=(10, 6))
 fig, ax = plt.subplots(figsize=(10, 6))
@@ -83,16 +100,6 @@ line_1st_team, = ax.plot(average_1st_team.index, average_1st_team.values, marker
 line_2nd_team, = ax.plot(average_2nd_team.index, average_2nd_team.values, marker='o', label='2nd Team')
 line_3rd_team, = ax.plot(average_3rd_team.index, average_3rd_team.values, marker='o', label='3rd Team')
 
-# Calculate and display the overall, 1st, 2nd and 3rd average
-overall_avg = average_years_to_first_all_nba.mean()
-average_1st_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA First Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
-average_2nd_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA Second Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
-average_3rd_team = filtered_players_stats[filtered_players_stats["nbapersonid"].isin(awards_data[awards_data["All NBA Third Team"] == 1]["nbapersonid"])].groupby("first_all_nba_year")["years_of_experience"].mean()
-
-print("\nOverall Average: {:.2f}".format(overall_avg))
-print("Average years of experience for 1st Team: {:.2f}".format(average_1st_team.mean()))
-print("Average years of experience for 2nd Team: {:.2f}".format(average_2nd_team.mean()))
-print("Average years of experience for 3rd Team: {:.2f}".format(average_3rd_team.mean()))
     # print(f"{season}: {avg:.2f}")
     
 # print("\nAverage years of experience for 2nd Team:\n")
@@ -144,20 +151,9 @@ plt.ylabel("Average Years of Experience")
 plt.title("Average Years of Experience to First All NBA Selection (2007-2021)")
 plt.legend()
 
-# Create checkboxes
-rax = plt.axes([0.3, 0.6, 0.15, 0.3], aspect='equal')
-check = CheckButtons(rax, ['Average', '1st Team', '2nd Team', '3rd Team'], [True, True, True, True])
-
-# Function to update line visibility
-def update_lines(label):
-    lines = {'Average': line_all_nba, '1st Team': line_1st_team, '2nd Team': line_2nd_team, '3rd Team': line_3rd_team}
-    for team_label, line in lines.items():
-        if label == team_label:
-            line.set_visible(not line.get_visible())
-    
-    plt.draw()
-
-check.on_clicked(update_lines)
+# Create checkboxes (toggling a line only schedules an idle redraw)
+lines = {'Average': line_all_nba, '1st Team': line_1st_team, '2nd Team': line_2nd_team, '3rd Team': line_3rd_team}
+check = add_line_toggles(fig, lines, [0.3, 0.6, 0.15, 0.3], aspect='equal')
 
 # Set labels, title, and legend
 # plt.xlabel("Year")
@@ -165,7 +161,7 @@ check.on_clicked(update_lines)
 # plt.title("Average Years of Experience to First All NBA Selection (2007-2021)")
 # plt.legend()
 
-plt.show()
+show(fig, 'part1_question2', data=experience)
 
 
 
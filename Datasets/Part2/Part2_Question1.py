@@ -5,16 +5,28 @@
 #   - Multiple games = (total of Off_reb) / (total of Off_reb chances)
 #   - Calculate OKC's predicted Off_reb percent in GAME 81
 
-import pandas as pd
+import os
+import sys
 # import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 
-# Load the data
-rebounding_data = pd.read_csv('team_rebounding_data_22.csv')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from okc_analysis.instrument import stage
+from okc_analysis.loader import load_dataset
+from okc_analysis.rebounding import ReboundForecaster
+from okc_analysis.render import parse_script_args, show, wants_chart
+from okc_analysis.simulation import season_summary, simulate_season
+
+parse_script_args("OKC's offensive rebounding percentage in game 81")
+
+# Load the data (from the columnar cache, rebuilt whenever the CSV changes)
+with stage('load') as trace:
+    rebounding_data = load_dataset('team_rebounding_data')
+    trace['rows'] = len(rebounding_data)
 
 # Filter data for OKC (Oklahoma City Thunder)
-okc_data = rebounding_data[rebounding_data['team'] == 'OKC']
+with stage('filter') as trace:
+    okc_data = rebounding_data[rebounding_data['team'] == 'OKC']
+    trace['rows'] = len(okc_data)
 
 # Calculate average offensive rebounding percent
 average_oreb_pct = okc_data['offensive_rebounds'].sum() / okc_data['off_rebound_chances'].sum()
@@ -22,10 +34,40 @@ average_oreb_pct = okc_data['offensive_rebounds'].sum() / okc_data['off_rebound_
 # Print the calculated average
 print("Average Offensive Rebound Percent for OKC:", '{:.1%}'.format(average_oreb_pct))
 
-# Predict offensive rebound percent for game 81 using the average
-predicted_oreb_pct = average_oreb_pct
+# Stream every team's games through the forecaster, so each game's prediction
+# only uses the games played before it (games 1-80 for OKC's game 81)
+with stage('predict') as trace:
+    forecaster = ReboundForecaster(halflife=10, window=10)
+    league_predictions = forecaster.process(rebounding_data)
+    trace['rows'] = len(league_predictions)
+okc_game_81 = league_predictions[(league_predictions['team'] == 'OKC') & (league_predictions['game_number'] == 81)].iloc[0]
+
+# Predict offensive rebound percent for game 81 using the season-to-date average before it
+predicted_oreb_pct = okc_game_81['season_to_date']
 
 print("Predicted Offensive Rebound Percent for Game 81:", '{:.1%}'.format(predicted_oreb_pct))
+print("  Last 10 games: {:.1%} | Exponentially weighted (10 game half-life): {:.1%}".format(okc_game_81['window'], okc_game_81['ewm']))
+
+# Simulate games 81-82 for every team 100,000 times, drawing each team's rate from its
+# posterior after game 80 and each game's offensive rebounds as binomial draws
+with stage('simulate') as trace:
+    simulated = simulate_season(rebounding_data, through_game=80, simulations=100000)
+    okc_outlook = season_summary(simulated).loc['OKC']
+    trace['rows'] = len(simulated['final_oreb_pct'])
+
+print("Simulated final Offensive Rebound Percent for OKC: {:.1%} (90% interval {:.1%} - {:.1%})".format(
+    okc_outlook['final_mean'], okc_outlook['final_low'], okc_outlook['final_high']))
+print("  Chance of finishing above the league average: {:.1%}".format(okc_outlook['p_above_threshold']))
+print("  Offensive rebounds in games 81-82: {:.1f} (90% interval {:.0f} - {:.0f})".format(
+    okc_outlook['remaining_mean'], okc_outlook['remaining_low'], okc_outlook['remaining_high']))
+
+# Only the chart is left: stop before seaborn / matplotlib are imported on a --text-only run,
+# or when the saved chart was drawn from the same data
+if not wants_chart('part2_question1', okc_data):
+    sys.exit()
+
+import seaborn as sns
+import matplotlib.pyplot as plt
 
 # Visualize the data using Seaborn and Matplotlib
 sns.set(style="whitegrid")
@@ -43,7 +85,7 @@ plt.title("OKC for 81 Games")
 plt.xlabel("Number of Games")
 plt.ylabel("Offensive Rebound % per Game")
 plt.legend()
-plt.show()
+show(plt.gcf(), 'part2_question1', data=okc_data)
 
 
 # import pandas as pd
@@ -0,0 +1,7 @@
+# Shared helpers for the Part1/Part2 analysis scripts.
+# The scripts are run from the Datasets folder, e.g.
+#   python Part1/Part1_Question3.py
+# and put this folder on sys.path so they can import okc_analysis.
+#
+# Every analysis is also available from one command line entry point:
+#   python -m okc_analysis outcomes --draft-years 2007-2015
@@ -0,0 +1,3 @@
+from okc_analysis.cli import main
+
+main()
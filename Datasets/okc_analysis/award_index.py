@@ -0,0 +1,198 @@
+# Objective:
+# In-memory award index for fast queries by player, season and award
+#   - Every player gets a dense position (sorted nbapersonid), and every
+#     award flag / count column gets one packed bitset per season over
+#     those positions (~300 bytes each), so "who made All NBA First Team in
+#     2016" or "did player P make an All-Star game in 2015-2018" is a few
+#     byte operations instead of a boolean filter over awards_data
+#   - Rank columns (allstar_rk, Most Valuable Player_rk, all_nba_points_rk,
+#     ...) are kept as dense season x player rank arrays with each season's
+#     players pre-sorted by rank, for top-k and "ranked k or better" queries
+#   - Bitsets combine with union / intersection / difference, and convert
+#     straight into row masks over player_stats (no hash-based isin)
+#
+# Run `python -m okc_analysis.award_index` from the Datasets folder for a few
+# example queries and their timings.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.schema import AWARD_COUNTS, AWARD_FLAGS, AWARD_RANKS
+
+FLAG_AWARDS = AWARD_FLAGS + AWARD_COUNTS  # counts (Player Of The Week, ...) index as "won at least once"
+NOT_RANKED = np.iinfo(np.int16).max
+
+
+# Test the bit of each (season offset, player position) pair in packed [season, byte] bitsets
+def test_bits(packed, offsets, positions):
+    return (packed[offsets, positions >> 3] >> (7 - (positions & 7)) & 1).astype(bool)
+
+
+class AwardIndex:
+    def __init__(self, player_ids, first_season, flags, ranks):
+        self.player_ids = player_ids
+        self.first_season = first_season
+        self.season_count = flags.shape[1]
+        self.awards = {award: i for i, award in enumerate(FLAG_AWARDS)}
+        self.rank_columns = {column: i for i, column in enumerate(AWARD_RANKS)}
+        self.bits = np.packbits(flags, axis=-1)  # award x season x byte
+        self.ranks = ranks  # rank column x season x player
+        self.rank_order = np.argsort(ranks, axis=-1, kind='stable')
+
+    @classmethod
+    def build(cls, awards_data, player_stats=None):
+        awards = awards_data.dropna(subset=['nbapersonid'])
+        ids = awards['nbapersonid'].to_numpy('int64')
+        seasons = awards['season'].to_numpy('int64')
+        player_ids = np.unique(ids)
+        first_season, last_season = seasons.min(), seasons.max()
+        if player_stats is not None:
+            player_ids = np.union1d(player_ids, player_stats['nbapersonid'].to_numpy('int64'))
+            first_season = min(first_season, player_stats['season'].min())
+            last_season = max(last_season, player_stats['season'].max())
+
+        offsets = seasons - first_season
+        positions = np.searchsorted(player_ids, ids)
+        shape = (int(last_season - first_season + 1), len(player_ids))
+
+        # Duplicate (season, player) rows simply set the same bit twice / keep the best rank
+        flags = np.zeros((len(FLAG_AWARDS),) + shape, dtype=bool)
+        for i, award in enumerate(FLAG_AWARDS):
+            selected = awards[award].eq(True) if award in AWARD_FLAGS else awards[award].gt(0)
+            selected = selected.fillna(False).to_numpy(bool)
+            flags[i, offsets[selected], positions[selected]] = True
+
+        ranks = np.full((len(AWARD_RANKS),) + shape, NOT_RANKED, dtype=np.int16)
+        for i, column in enumerate(AWARD_RANKS):
+            ranked = awards[column].notna().to_numpy(bool)
+            np.minimum.at(ranks[i], (offsets[ranked], positions[ranked]), awards[column][ranked].to_numpy(np.int16))
+        return cls(player_ids, int(first_season), flags, ranks)
+
+    # ---------------------------- Bitset queries ----------------------------
+
+    # Season offsets for one season, a range / list of seasons, or every season (None)
+    def season_offsets(self, seasons=None):
+        if seasons is None:
+            return np.arange(self.season_count)
+        offsets = np.atleast_1d(np.asarray(list(seasons) if isinstance(seasons, range) else seasons)) - self.first_season
+        return offsets[(offsets >= 0) & (offsets < self.season_count)]
+
+    def empty(self):
+        return np.zeros(self.bits.shape[-1], dtype=np.uint8)
+
+    # Players who won `award` in any of `seasons`
+    def award_bits(self, award, seasons=None):
+        offsets = self.season_offsets(seasons)
+        if len(offsets) == 0:
+            return self.empty()
+        return np.bitwise_or.reduce(self.bits[self.awards[award], offsets], axis=0)
+
+    # Players ranked `k` or better in `rank_column` in any of `seasons`
+    def rank_bits(self, rank_column, k, seasons=None):
+        offsets = self.season_offsets(seasons)
+        ranked = (self.ranks[self.rank_columns[rank_column], offsets] <= k).any(axis=0)
+        return np.packbits(ranked)
+
+    @staticmethod
+    def union(*bitsets):
+        return np.bitwise_or.reduce(bitsets)
+
+    @staticmethod
+    def intersection(*bitsets):
+        return np.bitwise_and.reduce(bitsets)
+
+    @staticmethod
+    def difference(bitset, other):
+        return bitset & ~other
+
+    def count(self, bitset):
+        return int(np.unpackbits(bitset, count=len(self.player_ids)).sum())
+
+    def ids(self, bitset):
+        return self.player_ids[np.flatnonzero(np.unpackbits(bitset, count=len(self.player_ids)))]
+
+    # Whether each player id is in the bitset (ids the index has never seen are not)
+    def contains(self, bitset, player_ids):
+        player_ids = np.asarray(player_ids, dtype='int64')
+        positions = np.searchsorted(self.player_ids, player_ids).clip(max=len(self.player_ids) - 1)
+        known = self.player_ids[positions] == player_ids
+        return known & test_bits(bitset[None], np.zeros_like(positions), positions)
+
+    # ------------------------------ Lookups ------------------------------
+
+    def won(self, player_id, award, seasons=None):
+        return bool(self.contains(self.award_bits(award, seasons), [player_id])[0])
+
+    def seasons_won(self, player_id, award):
+        position = np.searchsorted(self.player_ids, player_id)
+        if position == len(self.player_ids) or self.player_ids[position] != player_id:
+            return []
+        offsets = np.arange(self.season_count)
+        won = test_bits(self.bits[self.awards[award]], offsets, np.full_like(offsets, position))
+        return (offsets[won] + self.first_season).tolist()
+
+    # The k best-ranked players of one season, as a rank Series indexed by nbapersonid
+    # (empty for a season outside the index)
+    def top_k(self, rank_column, season, k):
+        column, offset = self.rank_columns[rank_column], season - self.first_season
+        if not 0 <= offset < self.season_count:
+            return pd.Series([], index=pd.Index([], dtype='int64', name='nbapersonid'), name=rank_column,
+                             dtype=self.ranks.dtype)
+        positions = self.rank_order[column, offset, :k]
+        ranks = self.ranks[column, offset, positions]
+        positions, ranks = positions[ranks != NOT_RANKED], ranks[ranks != NOT_RANKED]
+        return pd.Series(ranks, index=pd.Index(self.player_ids[positions], name='nbapersonid'), name=rank_column)
+
+    # ----------------------------- Row masks -----------------------------
+
+    # Rows (e.g. of player_stats) whose player is in the bitset
+    def player_mask(self, frame, bitset):
+        return self.contains(bitset, frame['nbapersonid'].to_numpy('int64'))
+
+    # Rows whose player won `award` in that row's own season
+    def award_mask(self, frame, award):
+        player_ids = frame['nbapersonid'].to_numpy('int64')
+        positions = np.searchsorted(self.player_ids, player_ids).clip(max=len(self.player_ids) - 1)
+        offsets = frame['season'].to_numpy('int64') - self.first_season
+        valid = (self.player_ids[positions] == player_ids) & (offsets >= 0) & (offsets < self.season_count)
+        mask = np.zeros(len(frame), dtype=bool)
+        mask[valid] = test_bits(self.bits[self.awards[award]], offsets[valid], positions[valid])
+        return mask
+
+
+# Built once per process for the CSVs in data_dir
+@lru_cache(maxsize=None)
+def load_award_index(data_dir=None):
+    from okc_analysis.loader import load_datasets
+    awards_data, player_stats = load_datasets('awards_data', 'player_stats', data_dir=data_dir)
+    return AwardIndex.build(awards_data, player_stats)
+
+
+if __name__ == '__main__':
+    import timeit
+
+    from okc_analysis.loader import load_datasets
+
+    awards_data, player_stats = load_datasets('awards_data', 'player_stats')
+    index = load_award_index()
+    names = player_stats.drop_duplicates('nbapersonid').set_index('nbapersonid')['player']
+
+    def timed(label, query, number=1000):
+        seconds = timeit.timeit(query, number=number) / number
+        print(f"{label:<60} {seconds * 1e6:9.1f} us")
+        return query()
+
+    print("------- Query timings -------\n")
+    first_team = timed("All NBA First Team in 2016 (bitset)", lambda: index.ids(index.award_bits('All NBA First Team', 2016)))
+    timed("All NBA First Team in 2016 (pandas filter)", lambda: awards_data.loc[
+        awards_data['All NBA First Team'].eq(True) & awards_data['season'].eq(2016), 'nbapersonid'].unique())
+    all_star_and_mvp = timed("All-Star 2015-2021 AND MVP top 5 2015-2021", lambda: index.ids(index.intersection(
+        index.award_bits('all_star_game', range(2015, 2022)), index.rank_bits('Most Valuable Player_rk', 5, range(2015, 2022)))))
+    timed("Rows of player_stats whose season made the All-Star game", lambda: index.award_mask(player_stats, 'all_star_game'), 100)
+    top_mvp = timed("MVP voting top 3 in 2021", lambda: index.top_k('Most Valuable Player_rk', 2021, 3))
+
+    print("\nAll NBA First Team 2016:", ', '.join(names.reindex(first_team).dropna()))
+    print("All-Star and MVP top 5 (2015-2021):", ', '.join(names.reindex(all_star_and_mvp).dropna()))
+    print("MVP top 3 2021:", ', '.join(f"{names.get(pid, pid)} ({rank})" for pid, rank in top_mvp.items()))
@@ -0,0 +1,121 @@
+# Objective:
+# Walk-forward backtest of next-game offensive rebounding estimators
+#   - Hold the season as team x game matrices of offensive rebounds and
+#     offensive rebound chances
+#   - Build every candidate's prediction for every team and game at once,
+#     using only the games before it:
+#       season-to-date, rolling N games, EWMA over a grid of half-lives,
+#       and season-to-date shrunk toward the league rate
+#   - Score each candidate with chance-weighted MAE / RMSE
+#
+# Run `python -m okc_analysis.backtest` from the Datasets folder to print
+# the best configurations.
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = np.arange(1, 41)
+DEFAULT_HALFLIVES = np.arange(0.5, 40.5, 0.5)
+DEFAULT_STRENGTHS = np.arange(0, 1010, 10)
+
+
+# Team x game matrices (rows follow the sorted team abbreviations)
+def rebounding_matrices(rebounding_data):
+    rebounds = rebounding_data.pivot(index='team', columns='game_number', values='offensive_rebounds')
+    chances = rebounding_data.pivot(index='team', columns='game_number', values='off_rebound_chances')
+    return rebounds.index, rebounds.to_numpy(float), chances.to_numpy(float)
+
+
+# Cumulative sums of everything strictly before each game (column 0 is all zeros)
+def prior_sums(values):
+    totals = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(values, axis=1, out=totals[:, 1:])
+    return totals
+
+
+def ratio(rebounds, chances):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(chances > 0, rebounds / chances, np.nan)
+
+
+def season_to_date(rebounds, chances):
+    return ratio(prior_sums(rebounds)[:, :-1], prior_sums(chances)[:, :-1])
+
+
+# Last-N-games ratio for every N at once -> (windows, teams, games)
+def rolling(rebounds, chances, windows):
+    rebound_sums, chance_sums = prior_sums(rebounds), prior_sums(chances)
+    games = np.arange(rebounds.shape[1])
+    starts = np.maximum(games[None, :] - np.asarray(windows)[:, None], 0)
+    window_rebounds = rebound_sums[:, games][None] - rebound_sums[:, starts].transpose(1, 0, 2)
+    window_chances = chance_sums[:, games][None] - chance_sums[:, starts].transpose(1, 0, 2)
+    return ratio(window_rebounds, window_chances)
+
+
+# Exponentially weighted ratio for every half-life at once -> (halflives, teams, games).
+# weights[h, g, j] is the weight game j gets when predicting game g (zero unless j < g).
+def ewma(rebounds, chances, halflives):
+    games = np.arange(rebounds.shape[1])
+    lag = games[:, None] - games[None, :]
+    decay = 0.5 ** (1 / np.asarray(halflives, dtype=float))
+    weights = np.where(lag > 0, decay[:, None, None] ** (lag - 1), 0.0)
+    return ratio(np.einsum('hgj,tj->htg', weights, rebounds), np.einsum('hgj,tj->htg', weights, chances))
+
+
+# Season-to-date ratio with `strength` pseudo-chances at the league's
+# prior rate -> (strengths, teams, games)
+def shrinkage(rebounds, chances, strengths):
+    rebound_sums, chance_sums = prior_sums(rebounds)[:, :-1], prior_sums(chances)[:, :-1]
+    league_rate = ratio(rebound_sums.sum(axis=0), chance_sums.sum(axis=0))
+    strengths = np.asarray(strengths, dtype=float)[:, None, None]
+    return ratio(rebound_sums[None] + strengths * league_rate, chance_sums[None] + strengths)
+
+
+# Chance-weighted errors of every candidate, scored on the games every candidate can predict
+def score(predictions, rebounds, chances):
+    actual = ratio(rebounds, chances)
+    valid = np.isfinite(predictions).all(axis=0) & np.isfinite(actual)
+    weights = np.where(valid, chances, 0.0)
+    errors = np.where(valid, predictions - actual, 0.0)
+    total = weights.sum()
+    mae = (np.abs(errors) * weights).sum(axis=(1, 2)) / total
+    rmse = np.sqrt((errors ** 2 * weights).sum(axis=(1, 2)) / total)
+    return mae, rmse
+
+
+def backtest(rebounding_data, windows=DEFAULT_WINDOWS, halflives=DEFAULT_HALFLIVES, strengths=DEFAULT_STRENGTHS):
+    teams, rebounds, chances = rebounding_matrices(rebounding_data)
+
+    candidates = [('season_to_date', np.nan)]
+    candidates += [('rolling', window) for window in windows]
+    candidates += [('ewma', halflife) for halflife in halflives]
+    candidates += [('shrinkage', strength) for strength in strengths]
+    predictions = np.concatenate([
+        season_to_date(rebounds, chances)[None],
+        rolling(rebounds, chances, windows),
+        ewma(rebounds, chances, halflives),
+        shrinkage(rebounds, chances, strengths),
+    ])
+
+    mae, rmse = score(predictions, rebounds, chances)
+    results = pd.DataFrame(candidates, columns=['estimator', 'parameter'])
+    results['mae'] = mae
+    results['rmse'] = rmse
+    return results.sort_values('rmse', ignore_index=True)
+
+
+if __name__ == '__main__':
+    import time
+
+    from okc_analysis.loader import load_dataset
+
+    rebounding_data = load_dataset('team_rebounding_data')
+    start = time.perf_counter()
+    results = backtest(rebounding_data)
+    elapsed = time.perf_counter() - start
+
+    print(f"Scored {len(results)} estimator configurations in {elapsed:.2f}s\n")
+    print("------- Best configuration per estimator -------")
+    best = results.groupby('estimator', sort=False).head(1)
+    for _, row in best.iterrows():
+        print(f"{row['estimator']} ({row['parameter']:g}): MAE {row['mae']:.4f} | RMSE {row['rmse']:.4f}")
@@ -0,0 +1,334 @@
+# Objective:
+# Benchmark every computational stage of the analyses as the history grows
+#   - Generate schema-faithful synthetic player_stats / awards_data /
+#     team_rebounding_data at 1x, 10x, 100x (and 1000x) the shipped data:
+#     each copy of the real data gets fresh player ids / team names and
+#     jittered counting stats, so the joins, groupings and award lookups
+#     behave like the real thing
+#   - Time (best / median of N runs) and memory-profile (tracemalloc peak)
+#     each stage of Part1_Question1/2/3, OpenMinded and Part2_Question1 in
+#     isolation, with plotting excluded
+#   - Write the results as a JSON baseline, and compare a run against an
+#     older baseline to catch regressions
+#
+# Run from the Datasets folder, e.g.
+#   python -m okc_analysis.benchmark --scales 1 10 100
+#   python -m okc_analysis.benchmark --compare benchmarks/baseline.json
+# A compare run writes its results to a temporary file (never over the baseline it reads)
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.backtest import backtest
+from okc_analysis.features import player_features
+from okc_analysis.loader import DATA_DIR, load_datasets
+from okc_analysis.milestones import experience_by_first_season, first_milestone_seasons
+from okc_analysis.model import FEATURES, score_players, train_model, training_data
+from okc_analysis.normalization import normalize_counts
+from okc_analysis.outcomes import classify_career_outcomes
+from okc_analysis.rebounding import ReboundForecaster
+from okc_analysis.schema import COUNTING_STATS
+from okc_analysis.team_context import TeamContext, team_features
+from okc_analysis.tiers import SCORING_TIERS, tier_per_game, tier_season_totals
+
+SCALES = (1, 10, 100, 1000)
+DEFAULT_SCALES = (1, 10, 100)  # 1000x needs tens of GB for the backtest tensors; opt in with --scales
+BASELINE_PATH = os.path.join(DATA_DIR, 'benchmarks', 'baseline.json')
+REGRESSION_THRESHOLD = 1.25
+
+
+# ------------------------------ Synthetic data ------------------------------
+
+# Counting stats scaled by one random factor per row (games played stay real, starts are capped by them)
+def jitter_counts(frame, rng):
+    factor = rng.lognormal(0, 0.1, len(frame))
+    for stat in COUNTING_STATS:
+        if stat == 'games':
+            continue
+        values = np.round(frame[stat].to_numpy(float) * factor)
+        if stat == 'games_start':
+            values = np.minimum(values, frame['games'].to_numpy(float))
+        frame[stat] = values.astype(frame[stat].dtype)
+    return frame
+
+
+def synthetic_player_data(player_stats, awards_data, scale, rng):
+    id_offset = int(player_stats['nbapersonid'].max()) + 1
+    stats_copies, awards_copies = [player_stats], [awards_data]
+    for copy in range(1, scale):
+        stats = player_stats.copy()
+        stats['nbapersonid'] = stats['nbapersonid'] + copy * id_offset
+        stats['player'] = stats['player'].astype(str) + f' #{copy}'
+        stats_copies.append(jitter_counts(stats, rng))
+
+        awards = awards_data.copy()
+        awards['nbapersonid'] = awards['nbapersonid'] + copy * id_offset
+        awards_copies.append(awards)
+
+    stats = pd.concat(stats_copies, ignore_index=True)
+    stats['player'] = stats['player'].astype('category')
+    stats['team'] = stats['team'].astype('category')
+    return stats, pd.concat(awards_copies, ignore_index=True)
+
+
+def synthetic_rebounding_data(rebounding_data, scale, rng):
+    copies = [rebounding_data]
+    for copy in range(1, scale):
+        games = rebounding_data.copy()
+        games['team'] = games['team'] + str(copy)
+        games['opp_team'] = games['opp_team'] + str(copy)
+        chances = games['off_rebound_chances'].to_numpy()
+        games['offensive_rebounds'] = rng.binomial(chances, games['oreb_pct'].to_numpy().clip(0, 1))
+        games['oreb_pct'] = games['offensive_rebounds'] / chances
+        copies.append(games)
+    return pd.concat(copies, ignore_index=True)
+
+
+def synthetic_datasets(scale, seed=0):
+    rng = np.random.default_rng(seed)
+    player_stats, awards_data, team_stats, rebounding_data = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                                           'team_rebounding_data')
+    player_stats, awards_data = synthetic_player_data(player_stats, awards_data, scale, rng)
+    rebounding_data = synthetic_rebounding_data(rebounding_data, scale, rng)
+    # The team/season table grows with seasons, not players, so it is never scaled
+    context = TeamContext.build(team_stats)
+    return {'player_stats': player_stats, 'awards_data': awards_data, 'season_lengths': context.season_lengths(),
+            'team_context': context, 'rebounding_data': rebounding_data}
+
+
+# ---------------------------------- Stages ----------------------------------
+# Each stage reads what it needs from `data` (the synthetic datasets plus the
+# outputs of the stages before it) and returns its own output.
+
+def stage_q1_tier_totals(data):
+    return tier_season_totals(data['player_stats'], data['awards_data'], stats=['points', 'games'],
+                              first_season=2007, last_season=2021)
+
+
+def stage_q1_tier_per_game(data):
+    return tier_per_game(data['q1_tier_totals'], stats=['points'], tiers=SCORING_TIERS)
+
+
+def stage_q2_first_milestones(data):
+    return first_milestone_seasons(data['player_stats'], data['awards_data'])
+
+
+def stage_q2_experience(data):
+    return experience_by_first_season(data['q2_first_milestones'])
+
+
+# Same adjustment as Part1_Question3.py
+def stage_q3_normalize(data):
+    player_stats = data['player_stats'].copy()
+    adjusted = normalize_counts(player_stats, ['mins', 'games_start'], data['season_lengths'])
+    player_stats['adjusted_minutes'] = adjusted['mins']
+    player_stats['adjusted_games_start'] = adjusted['games_start']
+    return player_stats
+
+
+def stage_q3_classify(data):
+    player_stats = data['q3_normalize']
+    return classify_career_outcomes(player_stats[player_stats['draftyear'] == 2010], data['awards_data'],
+                                    games_col='adjusted_games_start', minutes_col='adjusted_minutes')
+
+
+def stage_open_features(data):
+    return player_features(data['player_stats'], data['awards_data'], data['team_context'])
+
+
+def stage_open_team_features(data):
+    return team_features(data['player_stats'], data['team_context'])
+
+
+def stage_open_training_data(data):
+    return training_data(data['player_stats'], data['awards_data'], data['open_features'],
+                         season_lengths=data['season_lengths'])
+
+
+# Artifact kept in memory only, so the benchmark never touches the saved model
+def stage_open_train(data):
+    pipeline, accuracy = train_model(data['open_training_data'])
+    return {'pipeline': pipeline, 'features': list(FEATURES), 'accuracy': accuracy}
+
+
+def stage_open_score(data):
+    return score_players(data['open_features'], draft_years=range(2018, 2022), artifact=data['open_train'])
+
+
+def stage_part2_forecast(data):
+    return ReboundForecaster(halflife=10, window=10).process(data['rebounding_data'])
+
+
+def stage_part2_backtest(data):
+    return backtest(data['rebounding_data'])
+
+
+STAGES = {
+    'q1_tier_totals': stage_q1_tier_totals,
+    'q1_tier_per_game': stage_q1_tier_per_game,
+    'q2_first_milestones': stage_q2_first_milestones,
+    'q2_experience': stage_q2_experience,
+    'q3_normalize': stage_q3_normalize,
+    'q3_classify': stage_q3_classify,
+    'open_features': stage_open_features,
+    'open_team_features': stage_open_team_features,
+    'open_training_data': stage_open_training_data,
+    'open_train': stage_open_train,
+    'open_score': stage_open_score,
+    'part2_forecast': stage_part2_forecast,
+    'part2_backtest': stage_part2_backtest,
+}
+
+
+# Selected stages plus the earlier stages of the same analysis they build on
+def with_dependencies(stages):
+    groups = {name.split('_')[0] for name in stages}
+    last = {group: max(list(STAGES).index(name) for name in stages if name.startswith(group + '_')) for group in groups}
+    return [name for position, name in enumerate(STAGES)
+            if name.split('_')[0] in groups and position <= last[name.split('_')[0]]]
+
+
+# -------------------------------- Measuring ---------------------------------
+
+def output_rows(result):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+# Timed runs first, then one extra run under tracemalloc for the peak allocation
+def measure(stage, data, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = stage(data)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        'best_seconds': min(timings),
+        'median_seconds': statistics.median(timings),
+        'peak_mib': peak / 2**20,
+        'output_rows': output_rows(result),
+    }
+
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=None, repeat=3, seed=0):
+    stages = with_dependencies(stages) if stages else list(STAGES)
+    results = {}
+    for scale in scales:
+        data = synthetic_datasets(scale, seed=seed)
+        results[str(scale)] = scale_results = {
+            'player_season_rows': len(data['player_stats']),
+            'team_game_rows': len(data['rebounding_data']),
+            'stages': {},
+        }
+        for name in stages:
+            try:
+                data[name], scale_results['stages'][name] = measure(STAGES[name], data, repeat)
+            except MemoryError:
+                scale_results['stages'][name] = {'error': 'MemoryError'}
+                break
+            print(f"{scale:>5}x  {name:<20} {scale_results['stages'][name]['best_seconds']:9.4f}s"
+                  f"  {scale_results['stages'][name]['peak_mib']:9.1f} MiB")
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+# Stages that got slower than `threshold` x the baseline's best time
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    regressions = []
+    for scale, scale_results in results.items():
+        old_stages = baseline.get('results', {}).get(scale, {}).get('stages', {})
+        for name, stats in scale_results['stages'].items():
+            old = old_stages.get(name, {})
+            if 'best_seconds' not in stats or 'best_seconds' not in old:
+                continue
+            change = stats['best_seconds'] / old['best_seconds'] if old['best_seconds'] else np.inf
+            if change > threshold:
+                regressions.append((scale, name, old['best_seconds'], stats['best_seconds'], change))
+    return regressions
+
+
+# Stages measured in this run that the baseline has no timing for, so compare() can't check them
+def missing_from_baseline(results, baseline):
+    missing = []
+    for scale, scale_results in results.items():
+        old_stages = baseline.get('results', {}).get(scale, {}).get('stages', {})
+        missing += [(scale, name) for name, stats in scale_results['stages'].items()
+                    if 'best_seconds' in stats and 'best_seconds' not in old_stages.get(name, {})]
+    return missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every analysis stage on synthetic data')
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES), choices=SCALES)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES),
+                        help='stages to run, plus the ones they depend on (default: all)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='results JSON (default: the baseline, or a temporary file with --compare)')
+    parser.add_argument('--compare', help='older baseline JSON to check for regressions')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    # Read the baseline up front, and never write the results over it
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    output = args.output
+    if output is None:
+        output = (os.path.join(tempfile.gettempdir(), f'okc_benchmark_{time.strftime("%Y%m%d_%H%M%S")}.json')
+                  if args.compare else BASELINE_PATH)
+    if args.compare and os.path.realpath(output) == os.path.realpath(args.compare):
+        parser.error('--output would overwrite the --compare baseline')
+
+    results = run_benchmarks(args.scales, stages=args.stages, repeat=args.repeat, seed=args.seed)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'environment': environment(), 'repeat': args.repeat, 'seed': args.seed, 'results': results},
+                  f, indent=2)
+    print(f"\nWrote {output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\n------- Regressions (> {args.threshold:g}x slower than {args.compare}) -------")
+        for scale, name, old, new, change in regressions:
+            print(f"{scale:>5}x  {name:<20} {old:9.4f}s -> {new:9.4f}s  ({change:.2f}x)")
+        if not regressions:
+            print("None")
+        missing = missing_from_baseline(results, baseline)
+        if missing:
+            print(f"\n------- Not in {args.compare} (regenerate the baseline) -------")
+            for scale, name in missing:
+                print(f"{scale:>5}x  {name}")
+        return 1 if regressions or missing else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,92 @@
+# Objective:
+# Interactive chart helpers that update existing artists instead of redrawing the figure
+#   - add_line_toggles(): CheckButtons that flip a line's visibility and
+#     schedule a single idle redraw
+#   - BarTooltip: one annotation built up front; mouse moves are throttled,
+#     only re-render when the hovered bar changes, and use blitting when the
+#     backend supports it
+
+import time
+
+
+# Checkboxes controlling the visibility of each labelled line.
+# Keep a reference to the returned CheckButtons or it stops responding.
+def add_line_toggles(fig, lines, rect, **kwargs):
+    from matplotlib.widgets import CheckButtons
+
+    rax = fig.add_axes(rect, **kwargs)
+    labels = list(lines)
+    check_buttons = CheckButtons(rax, labels, [line.get_visible() for line in lines.values()])
+
+    def toggle(label):
+        line = lines[label]
+        line.set_visible(not line.get_visible())
+        fig.canvas.draw_idle()  # Redraw once when the GUI is idle, not on every click
+
+    check_buttons.on_clicked(toggle)
+    return check_buttons
+
+
+# Tooltip listing the names behind each bar of a bar chart
+class BarTooltip:
+    def __init__(self, ax, bars, texts, min_interval=1 / 30, **annotate_kwargs):
+        self.ax = ax
+        self.fig = ax.figure
+        self.bars = list(bars)
+        self.texts = list(texts)
+        self.min_interval = min_interval
+        self.last_event = 0.0
+        self.active = None
+        self.background = None
+
+        annotate_kwargs = {'textcoords': 'offset points', 'xytext': (0, 10), 'ha': 'center', 'fontsize': 10,
+                           **annotate_kwargs}
+        self.annotation = ax.annotate('', (0, 0), **annotate_kwargs)
+        self.annotation.set_visible(False)
+        self.annotation.set_animated(self.supports_blit())
+
+        self.fig.canvas.mpl_connect('draw_event', self.on_draw)
+        self.fig.canvas.mpl_connect('motion_notify_event', self.on_move)
+
+    # Grab the rendered figure (without the tooltip) to restore under each new tooltip
+    def on_draw(self, event):
+        if self.supports_blit():
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+            self.ax.draw_artist(self.annotation)
+
+    def supports_blit(self):
+        return getattr(self.fig.canvas, 'supports_blit', False)
+
+    def hovered_bar(self, event):
+        if event.inaxes is not self.ax:
+            return None
+        for index, bar in enumerate(self.bars):
+            if bar.contains(event)[0]:
+                return index
+        return None
+
+    def on_move(self, event):
+        now = time.monotonic()
+        if now - self.last_event < self.min_interval:
+            return
+        self.last_event = now
+
+        index = self.hovered_bar(event)
+        if index == self.active:
+            return
+        self.active = index
+
+        if index is not None:
+            bar = self.bars[index]
+            self.annotation.xy = (bar.get_x() + bar.get_width() / 2, bar.get_height())
+            self.annotation.set_text(self.texts[index])
+        self.annotation.set_visible(index is not None)
+        self.refresh()
+
+    def refresh(self):
+        if self.background is None:
+            self.fig.canvas.draw_idle()
+            return
+        self.fig.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.annotation)
+        self.fig.canvas.blit(self.fig.bbox)
@@ -0,0 +1,253 @@
+# Objective:
+# One command-line entry point for every analysis
+#   - tiers       (Part1_Question1) points per game of each award tier by season
+#   - milestones  (Part1_Question2) years of experience to each first award
+#   - outcomes    (Part1_Question3) career outcome breakdown of draft classes
+#   - draft-classes  draft year x outcome counts / shares / pick bands (cached)
+#   - predict     (OpenMinded) career outcome probabilities of draft classes
+#   - rebounding  (Part2_Question1) next-game offensive rebounding estimates
+#   - awards      players who won any / all of some awards, or the top of a
+#                 voting rank column, from the bitset award index
+#   - comparables the most similar historical players of each drafted player
+#                 and how their careers turned out
+#   - Every subcommand takes --data-dir, and --draft-years / --seasons as
+#     single years, lists or ranges (e.g. --draft-years 2007-2015)
+#   - The data is loaded once; outcomes fans out one task per draft class
+#     and tiers one task per season over a process pool that receives the
+#     loaded frames once per worker
+#
+# From the Datasets folder:
+#   python -m okc_analysis outcomes --draft-years 2007-2015
+#   python -m okc_analysis tiers --seasons 2010-2021 --output tiers.csv
+#   python -m okc_analysis predict --draft-years 2018-2021
+#   python -m okc_analysis awards --award all_star_game 'All NBA First Team' --match all --seasons 2015-2021
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from okc_analysis.award_index import FLAG_AWARDS, load_award_index
+from okc_analysis.comparables import draft_class_comparables
+from okc_analysis.draft_classes import load_draft_class_matrix
+from okc_analysis.features import load_player_features
+from okc_analysis import instrument
+from okc_analysis.instrument import stage
+from okc_analysis.loader import DATA_DIR, load_datasets
+from okc_analysis.milestones import experience_by_first_season, first_milestone_seasons
+from okc_analysis.model import load_or_train, score_players
+from okc_analysis.normalization import season_lengths
+from okc_analysis.outcomes import OUTCOME_ORDER, classify_career_outcomes
+from okc_analysis.rebounding import ReboundForecaster
+from okc_analysis.schema import AWARD_RANKS
+from okc_analysis.tiers import SCORING_TIERS, tier_per_game, tier_season_totals
+
+
+# "2007-2015", "2010" or several of either -> sorted list of years (or game numbers)
+def parse_ranges(values):
+    years = set()
+    for value in values or []:
+        first, _, last = str(value).partition('-')
+        years.update(range(int(first), int(last or first) + 1))
+    return sorted(years)
+
+
+# ------------------------------ Process pool ------------------------------
+# The loaded frames are handed to each worker once (initializer), and every
+# task only carries its draft year or season.
+
+_shared = {}
+
+
+def init_worker(frames):
+    _shared.update(frames)
+
+
+def run_tasks(function, tasks, frames, workers=None):
+    if workers == 1:
+        init_worker(frames)
+        return [function(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(frames,)) as pool:
+        return list(pool.map(function, tasks))
+
+
+def draft_class_outcomes(task):
+    draft_year, first_season, last_season = task
+    player_stats = _shared['player_stats']
+    draft_class = player_stats[player_stats['draftyear'] == draft_year]
+    outcomes = classify_career_outcomes(draft_class, _shared['awards_data'], first_season=first_season,
+                                        last_season=last_season, season_lengths=_shared['season_lengths'])
+    return outcomes.value_counts().reindex(OUTCOME_ORDER, fill_value=0).rename(draft_year)
+
+
+def season_tier_totals(season):
+    player_stats, awards_data = _shared['player_stats'], _shared['awards_data']
+    return tier_season_totals(player_stats[player_stats['season'] == season],
+                              awards_data[awards_data['season'] == season], stats=['points', 'games'])
+
+
+# ------------------------------- Subcommands -------------------------------
+# Each returns the table to print (or write with --output)
+
+def run_tiers(args):
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data', data_dir=args.data_dir)
+    seasons = parse_ranges(args.seasons) or sorted(player_stats['season'].unique().tolist())
+    frames = {'player_stats': player_stats, 'awards_data': awards_data}
+    totals = pd.concat(run_tasks(season_tier_totals, seasons, frames, args.workers))
+    return tier_per_game(totals, stats=['points'], tiers=SCORING_TIERS)['points']
+
+
+def run_milestones(args):
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data', data_dir=args.data_dir)
+    milestones = first_milestone_seasons(player_stats, awards_data)
+    draft_years = parse_ranges(args.draft_years)
+    if draft_years:
+        milestones = milestones[milestones['draftyear'].isin(draft_years)]
+    experience = experience_by_first_season(milestones)
+    seasons = parse_ranges(args.seasons)
+    return experience[experience.index.isin(seasons)] if seasons else experience
+
+
+def run_outcomes(args):
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=args.data_dir)
+    seasons = parse_ranges(args.seasons)
+    tasks = [(draft_year, seasons[0], seasons[-1]) for draft_year in parse_ranges(args.draft_years)]
+    frames = {'player_stats': player_stats, 'awards_data': awards_data, 'season_lengths': season_lengths(team_stats)}
+    counts = pd.DataFrame(run_tasks(draft_class_outcomes, tasks, frames, args.workers))
+    return counts.rename_axis('draftyear')
+
+
+def run_draft_classes(args):
+    seasons = parse_ranges(args.seasons)
+    table = load_draft_class_matrix(seasons[0], seasons[-1], data_dir=args.data_dir)[args.table.replace('-', '_')]
+    draft_years = parse_ranges(args.draft_years)
+    if draft_years:
+        table = table[table.index.get_level_values('draftyear').isin(draft_years)]
+    return table
+
+
+def run_predict(args):
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=args.data_dir)
+    features = load_player_features(data_dir=args.data_dir)
+    artifact = load_or_train(player_stats, awards_data, features, season_lengths(team_stats), data_dir=args.data_dir)
+    return score_players(features, draft_years=parse_ranges(args.draft_years), artifact=artifact).set_index('player')
+
+
+def run_rebounding(args):
+    (rebounding_data,) = load_datasets('team_rebounding_data', data_dir=args.data_dir)
+    predictions = ReboundForecaster(halflife=args.halflife, window=args.window).process(rebounding_data)
+    team_games = predictions[predictions['team'] == args.team]
+    if args.games:
+        team_games = team_games[team_games['game_number'].isin(parse_ranges(args.games))]
+    return team_games.set_index('game_number')
+
+
+def run_awards(args):
+    (player_stats,) = load_datasets('player_stats', data_dir=args.data_dir)
+    index = load_award_index(args.data_dir)
+    names = player_stats.drop_duplicates('nbapersonid').set_index('nbapersonid')['player']
+    seasons = parse_ranges(args.seasons) or None
+    last_season = index.first_season + index.season_count - 1
+    if seasons and (seasons[0] < index.first_season or seasons[-1] > last_season):
+        raise SystemExit(f"--seasons must be within {index.first_season}-{last_season}")
+    if args.rank:
+        tops = [index.top_k(args.rank, season, args.top).to_frame().assign(season=season)
+                for season in seasons or range(index.first_season, index.first_season + index.season_count)]
+        table = pd.concat(tops).reset_index()
+        return table.assign(player=table['nbapersonid'].map(names)).set_index(['season', args.rank])
+
+    bitsets = [index.award_bits(award, seasons) for award in args.award]
+    combine = index.union if args.match == 'any' else index.intersection
+    player_ids = index.ids(combine(*bitsets))
+    return pd.DataFrame({'player': names.reindex(player_ids).to_numpy()},
+                        index=pd.Index(player_ids, name='nbapersonid'))
+
+
+def run_comparables(args):
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=args.data_dir)
+    comparables = draft_class_comparables(player_stats, awards_data, parse_ranges(args.draft_years), k=args.k,
+                                          max_seasons=args.max_seasons, season_lengths=season_lengths(team_stats))
+    return comparables.set_index(['player', 'rank'])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m okc_analysis', description='Run any of the OKC analyses')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--data-dir', default=DATA_DIR, help='folder holding the CSV files (default: %(default)s)')
+    common.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores)')
+    common.add_argument('--output', help='write the table to this CSV file instead of printing it')
+    common.add_argument('--trace', action='store_true', help='record stage timings (same as OKC_TRACE=1)')
+    common.add_argument('--profile', action='store_true', help='also dump cProfile output per stage')
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    tiers = commands.add_parser('tiers', parents=[common], help='points per game of each award tier')
+    tiers.add_argument('--seasons', nargs='+', help='default: every season in the data')
+    tiers.set_defaults(run=run_tiers)
+
+    milestones = commands.add_parser('milestones', parents=[common], help='years of experience to first awards')
+    milestones.add_argument('--draft-years', nargs='+', default=['2007-2021'])
+    milestones.add_argument('--seasons', nargs='+', help='first-award seasons to report (default: all)')
+    milestones.set_defaults(run=run_milestones)
+
+    outcomes = commands.add_parser('outcomes', parents=[common], help='career outcome counts per draft class')
+    outcomes.add_argument('--draft-years', nargs='+', default=['2010'])
+    outcomes.add_argument('--seasons', nargs='+', default=['2015-2021'], help='evaluation window')
+    outcomes.set_defaults(run=run_outcomes)
+
+    draft_classes = commands.add_parser('draft-classes', parents=[common],
+                                        help='draft year x outcome matrix for every class at once')
+    draft_classes.add_argument('--draft-years', nargs='+', help='default: every draft class')
+    draft_classes.add_argument('--seasons', nargs='+', default=['2015-2021'], help='evaluation window')
+    draft_classes.add_argument('--table', choices=['counts', 'shares', 'pick-bands'], default='counts')
+    draft_classes.set_defaults(run=run_draft_classes)
+
+    predict = commands.add_parser('predict', parents=[common], help='career outcome probabilities')
+    predict.add_argument('--draft-years', nargs='+', default=['2018-2021'])
+    predict.set_defaults(run=run_predict)
+
+    rebounding = commands.add_parser('rebounding', parents=[common], help='next-game offensive rebound estimates')
+    rebounding.add_argument('--team', default='OKC')
+    rebounding.add_argument('--games', nargs='+', help='game numbers to report (default: all)')
+    rebounding.add_argument('--halflife', type=float, default=10)
+    rebounding.add_argument('--window', type=int, default=10)
+    rebounding.set_defaults(run=run_rebounding)
+
+    awards = commands.add_parser('awards', parents=[common], help='award winners from the bitset award index')
+    awards.add_argument('--award', nargs='+', choices=FLAG_AWARDS, default=['all_star_game'], metavar='AWARD')
+    awards.add_argument('--match', choices=['any', 'all'], default='any', help='won any or all of the awards')
+    awards.add_argument('--seasons', nargs='+', help='default: every season')
+    awards.add_argument('--rank', choices=AWARD_RANKS, metavar='RANK_COLUMN',
+                        help='list the top of this voting rank column per season instead')
+    awards.add_argument('--top', type=int, default=5)
+    awards.set_defaults(run=run_awards)
+
+    comparables = commands.add_parser('comparables', parents=[common], help='most similar historical players')
+    comparables.add_argument('--draft-years', nargs='+', default=['2018-2021'])
+    comparables.add_argument('--k', type=int, default=5, help='comparables per player')
+    comparables.add_argument('--max-seasons', type=int, default=4, help='compare through at most this many seasons')
+    comparables.set_defaults(run=run_comparables)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    instrument.configure(trace=args.trace, profile=args.profile)
+    args.data_dir = os.path.abspath(args.data_dir)
+    with stage(args.command) as trace:
+        table = args.run(args)
+        trace['rows'] = len(table)
+    if args.output:
+        table.to_csv(args.output)
+        print(f"Wrote {args.output}")
+    else:
+        with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', None,
+                               'display.float_format', '{:.3f}'.format):
+            print(table)
+
+
+if __name__ == '__main__':
+    main()
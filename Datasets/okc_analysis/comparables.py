@@ -0,0 +1,155 @@
+# Objective:
+# "Comparable players": which historical players looked most like a player
+# through their first N seasons, and how those careers turned out
+#   - One vector per player from their first N seasons after the draft:
+#     per-36 box score, minutes-weighted rate stats (off_reb_pct ... usg)
+#     and PER / BPM, and WS / VORP per season
+#   - Vectors are standardized with the historical pool's mean / std
+#     (missing values land on the mean), and a query is a blocked
+#     brute-force distance matrix (|q|^2 + |x|^2 - 2 q.x) with argpartition
+#     for the k nearest, so a whole draft class is one matrix product
+#   - The pool is the players drafted 2007-2015 with a known career outcome
+#     (the same labels the career outcome model trains on)
+#   - A player with fewer than N seasons is compared with the pool through
+#     the same number of seasons
+#
+# From the Datasets folder:
+#   python -m okc_analysis.comparables
+#   python -m okc_analysis comparables --draft-years 2018-2021 --k 5
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.features import PER_36_STATS
+from okc_analysis.outcomes import classify_career_outcomes
+
+RATE_STATS = ['off_reb_pct', 'def_reb_pct', 'tot_reb_pct', 'ast_pct', 'stl_pct', 'blk_pct', 'tov_pct', 'usg']
+IMPACT_STATS = ['PER', 'BPM']
+SEASON_STATS = ['WS', 'VORP']
+WEIGHTED_STATS = RATE_STATS + IMPACT_STATS
+VECTOR_COLUMNS = ([f'{stat}_per_36' for stat in PER_36_STATS] + WEIGHTED_STATS
+                  + [f'{stat}_per_season' for stat in SEASON_STATS])
+
+
+# Stat vector (indexed by nbapersonid) from each player's first `first_n` seasons after the draft
+def player_vectors(player_stats, first_n=4):
+    early = player_stats[(player_stats['season'] >= player_stats['draftyear']) &
+                         (player_stats['season'] < player_stats['draftyear'] + first_n)]
+    minutes = early['mins'].astype(float)
+    weighted = early[WEIGHTED_STATS].astype(float)
+
+    sums = pd.DataFrame({
+        **{stat: early[stat].astype(float) for stat in PER_36_STATS + SEASON_STATS},
+        'mins': minutes,
+        **{f'weighted_{stat}': weighted[stat].fillna(0) * minutes for stat in WEIGHTED_STATS},
+        **{f'minutes_{stat}': minutes.where(weighted[stat].notna(), 0) for stat in WEIGHTED_STATS},
+    })
+    totals = sums.groupby(early['nbapersonid']).sum()
+    seasons = early.groupby('nbapersonid')['season'].nunique()
+
+    vectors = pd.DataFrame(index=totals.index)
+    total_minutes = totals['mins'].replace(0, np.nan)
+    for stat in PER_36_STATS:
+        vectors[f'{stat}_per_36'] = totals[stat] / total_minutes * 36
+    for stat in WEIGHTED_STATS:
+        vectors[stat] = totals[f'weighted_{stat}'] / totals[f'minutes_{stat}'].replace(0, np.nan)
+    for stat in SEASON_STATS:
+        vectors[f'{stat}_per_season'] = totals[stat] / seasons
+    vectors['seasons'] = seasons
+    return vectors
+
+
+class ComparablesIndex:
+    def __init__(self, vectors, outcomes, names, block_size=2048):
+        values = vectors[VECTOR_COLUMNS].to_numpy(float)
+        self.mean = np.nanmean(values, axis=0)
+        scale = np.nanstd(values, axis=0)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.matrix = self.standardize(values)
+        self.squared_norms = (self.matrix ** 2).sum(axis=1)
+        self.player_ids = vectors.index.to_numpy('int64')
+        self.outcomes = outcomes.reindex(vectors.index).to_numpy()
+        self.names = names.reindex(vectors.index).to_numpy()
+        self.block_size = block_size
+
+    def standardize(self, values):
+        return np.nan_to_num((values - self.mean) / self.scale).astype(np.float32)
+
+    # The k nearest pool players of every query vector, nearest first, as one row per
+    # (query, rank). A query player is never their own comparable.
+    def query(self, vectors, k=5):
+        queries = self.standardize(vectors[VECTOR_COLUMNS].to_numpy(float))
+        query_ids = vectors.index.to_numpy('int64')
+        k = min(k, len(self.player_ids) - 1)
+        # Position of each query player in the pool, or -1
+        own = np.searchsorted(self.player_ids, query_ids).clip(max=len(self.player_ids) - 1)
+        own = np.where(self.player_ids[own] == query_ids, own, -1)
+
+        nearest, distances = [], []
+        for start in range(0, len(queries), self.block_size):
+            block = queries[start:start + self.block_size]
+            squared = (block ** 2).sum(axis=1)[:, None] + self.squared_norms[None, :] - 2 * block @ self.matrix.T
+            rows = np.flatnonzero(own[start:start + len(block)] >= 0)
+            squared[rows, own[start + rows]] = np.inf
+            top = np.argpartition(squared, k - 1, axis=1)[:, :k]
+            top_squared = np.take_along_axis(squared, top, axis=1)
+            order = np.argsort(top_squared, axis=1)
+            nearest.append(np.take_along_axis(top, order, axis=1))
+            distances.append(np.sqrt(np.maximum(np.take_along_axis(top_squared, order, axis=1), 0)))
+        nearest, distances = np.concatenate(nearest), np.concatenate(distances)
+
+        return pd.DataFrame({
+            'nbapersonid': np.repeat(query_ids, k),
+            'rank': np.tile(np.arange(1, k + 1), len(query_ids)),
+            'comparable_id': self.player_ids[nearest.ravel()],
+            'comparable': self.names[nearest.ravel()],
+            'distance': distances.ravel(),
+            'career_outcome': self.outcomes[nearest.ravel()],
+        })
+
+
+# k comparables of every player drafted in `draft_years`, each matched through as many
+# seasons as they have played (up to `max_seasons`), with the comparables' career outcomes
+def draft_class_comparables(player_stats, awards_data, draft_years, k=5, max_seasons=4, season_lengths=None,
+                            first_pool_year=2007, last_pool_year=2015):
+    names = player_stats.drop_duplicates('nbapersonid').set_index('nbapersonid')['player']
+    pool_stats = player_stats[player_stats['draftyear'].between(first_pool_year, last_pool_year)]
+    outcomes = classify_career_outcomes(pool_stats, awards_data, games_col='games', minutes_col='mins',
+                                        season_lengths=season_lengths)
+    pool_stats = pool_stats[pool_stats['nbapersonid'].isin(outcomes.index)]
+
+    query_vectors = player_vectors(player_stats[player_stats['draftyear'].isin(list(draft_years))], max_seasons)
+    results = []
+    for seasons, vectors in query_vectors.groupby('seasons'):
+        index = ComparablesIndex(player_vectors(pool_stats, seasons), outcomes, names)
+        results.append(index.query(vectors, k).assign(seasons=seasons))
+    comparables = pd.concat(results, ignore_index=True)
+    comparables.insert(1, 'player', comparables['nbapersonid'].map(names))
+    comparables['career_outcome'] = comparables['career_outcome'].astype(outcomes.dtype)
+    return comparables.sort_values(['nbapersonid', 'rank'], ignore_index=True)
+
+
+if __name__ == '__main__':
+    import time
+
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.normalization import season_lengths
+    from okc_analysis.outcomes import OUTCOME_ORDER
+
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats')
+    start = time.perf_counter()
+    comparables = draft_class_comparables(player_stats, awards_data, range(2018, 2022),
+                                          season_lengths=season_lengths(team_stats))
+    elapsed = time.perf_counter() - start
+    print(f"Comparables for {comparables['nbapersonid'].nunique()} players drafted 2018-2021 in {elapsed:.3f}s\n")
+
+    shares = comparables.groupby(['player', 'career_outcome'], observed=False).size().unstack()[OUTCOME_ORDER]
+    shares = shares.div(shares.sum(axis=1), axis=0)
+    best = shares.sort_values(OUTCOME_ORDER[:3], ascending=False).head(10)
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print("------- Comparables' career outcomes (top 10 by Elite / All-Star / Starter share) -------\n")
+        print((best * 100).round(0).to_string())
+        example = best.index[0]
+        print(f"\n------- Comparables of {example} -------\n")
+        print(comparables[comparables['player'] == example][['rank', 'comparable', 'distance', 'career_outcome']]
+              .to_string(index=False))
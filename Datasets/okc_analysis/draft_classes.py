@@ -0,0 +1,120 @@
+# Objective:
+# Career outcome breakdown of every draft class at once
+#   - Label every player in one grouped pass (classify_career_outcomes),
+#     then cross-tabulate draft year x outcome tier as counts and shares
+#   - The outcome is an ordered categorical (Out of the League < ... < Elite),
+#     so every tier shows up even when a class has nobody in it, and taking
+#     the max picks the best tier rather than the alphabetical last label
+#   - Also break each class down by draft-pick band (top 5, lottery, rest of
+#     the first round, second round, undrafted)
+#   - Cached on disk until a CSV (or the outcome window) changes
+#
+# Run `python -m okc_analysis.draft_classes` from the Datasets folder to print
+# the share matrix.
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from okc_analysis.loader import DATA_DIR, DATASETS, cache_paths, file_hash, load_datasets, read_cache, write_cache
+from okc_analysis.normalization import season_lengths
+from okc_analysis.outcomes import OUTCOME_DTYPE, OUTCOME_ORDER, OUTCOME_VERSION, classify_career_outcomes
+
+# Bump whenever the matrix definitions change, so stale caches are rebuilt
+DRAFT_CLASS_VERSION = 1
+
+# Upper pick of each band -> band label; picks past the last band (and missing picks) are undrafted
+PICK_BANDS = {5: 'Top 5', 14: 'Lottery', 30: 'First Round', 60: 'Second Round'}
+UNDRAFTED = 'Undrafted'
+BAND_ORDER = list(PICK_BANDS.values()) + [UNDRAFTED]
+
+
+def pick_bands(draft_picks):
+    edges = [0] + list(PICK_BANDS)
+    bands = pd.cut(draft_picks.astype(float), bins=edges, labels=list(PICK_BANDS.values()))
+    return bands.cat.add_categories(UNDRAFTED).fillna(UNDRAFTED)
+
+
+# Draft year, pick band and career outcome of every player (indexed by nbapersonid)
+def draft_class_outcomes(player_stats, awards_data, lengths=None, first_season=2015, last_season=2021):
+    outcomes = classify_career_outcomes(player_stats, awards_data, season_lengths=lengths,
+                                        first_season=first_season, last_season=last_season)
+    players = player_stats.drop_duplicates('nbapersonid').set_index('nbapersonid')
+    return pd.DataFrame({
+        'draftyear': players['draftyear'].reindex(outcomes.index),
+        'pick_band': pick_bands(players['draftpick'].reindex(outcomes.index)),
+        'career_outcome': outcomes,
+    })
+
+
+# Draft year x outcome counts and shares, and (draft year, pick band) x outcome counts.
+# Outcome columns run from best to worst.
+def draft_class_matrix(player_stats, awards_data, lengths=None, first_season=2015, last_season=2021):
+    players = draft_class_outcomes(player_stats, awards_data, lengths, first_season, last_season)
+    counts = players.groupby(['draftyear', 'career_outcome'], observed=False).size().unstack('career_outcome')
+    counts = counts[OUTCOME_ORDER]
+    shares = counts.div(counts.sum(axis=1), axis=0)
+    bands = players.groupby(['draftyear', 'pick_band', 'career_outcome'], observed=False).size()
+    bands = bands.unstack('career_outcome')[OUTCOME_ORDER]
+    bands = bands[bands.sum(axis=1) > 0]
+    return {'counts': counts, 'shares': shares, 'pick_bands': bands}
+
+
+def matrix_cache_key(data_dir, first_season, last_season):
+    hashes = {name: file_hash(os.path.join(data_dir, DATASETS[name]))
+              for name in ('player_stats', 'awards_data', 'team_stats')}
+    definition = hashlib.sha256(repr((DRAFT_CLASS_VERSION, OUTCOME_VERSION, OUTCOME_ORDER, PICK_BANDS)).encode()).hexdigest()
+    return {**hashes, 'definition': definition, 'window': [first_season, last_season]}
+
+
+def is_current(meta_path, key):
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, encoding='utf-8') as f:
+        return json.load(f) == key
+
+
+def read_matrix(name, data_path):
+    frame = read_cache(data_path)
+    index = ['draftyear', 'pick_band'] if name == 'pick_bands' else ['draftyear']
+    if name == 'pick_bands':
+        frame['pick_band'] = pd.Categorical(frame['pick_band'], categories=BAND_ORDER, ordered=True)
+    frame = frame.set_index(index)
+    frame.columns = pd.CategoricalIndex(frame.columns, dtype=OUTCOME_DTYPE, name='career_outcome')
+    return frame
+
+
+# Cached draft_class_matrix() for the CSVs in data_dir
+def load_draft_class_matrix(first_season=2015, last_season=2021, data_dir=None, cache_dir=None):
+    data_dir = data_dir or DATA_DIR
+    cache_dir = cache_dir or os.path.join(data_dir, '.cache')
+    names = ['counts', 'shares', 'pick_bands']
+    paths = {name: cache_paths(f'draft_class_{name}_{first_season}_{last_season}', cache_dir) for name in names}
+
+    key = matrix_cache_key(data_dir, first_season, last_season)
+    if all(os.path.exists(data_path) and is_current(meta_path, key) for data_path, meta_path in paths.values()):
+        return {name: read_matrix(name, paths[name][0]) for name in names}
+
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=data_dir, cache_dir=cache_dir)
+    matrix = draft_class_matrix(player_stats, awards_data, season_lengths(team_stats), first_season, last_season)
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, frame in matrix.items():
+        stored = frame.copy()
+        stored.columns = stored.columns.astype(str)
+        stored = stored.reset_index()
+        if 'pick_band' in stored:
+            stored['pick_band'] = stored['pick_band'].astype(str)
+        write_cache(stored, *paths[name], key)
+    return matrix
+
+
+if __name__ == '__main__':
+    matrix = load_draft_class_matrix()
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.max_rows', None):
+        print("------- Career outcome share by draft class (2015-2021 seasons) -------\n")
+        print((matrix['shares'] * 100).round(1).to_string())
+        print("\n------- Career outcome counts by draft pick band, all classes -------\n")
+        print(matrix['pick_bands'].groupby(level='pick_band', observed=True).sum().to_string())
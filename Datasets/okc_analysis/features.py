@@ -0,0 +1,131 @@
+# Objective:
+# One fixed-width feature vector per player, built from their first N seasons
+#   - First-N-season totals and per-game averages of the counting stats
+#   - Per-36-minute rates
+#   - Minutes-weighted PER / BPM and total WS / VORP
+#   - Draft pick and early award flags (All-Rookie, ROY votes, All-Star, All NBA)
+#   - Minutes-weighted ratings and win % of the teams they played for
+#     (gathered from the dense team/season table in team_context.py)
+#   - Computed in one grouped pass over player_stats joined to awards_data,
+#     and cached on disk until an input CSV (or this feature definition) changes
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.loader import DATA_DIR, DATASETS, cache_paths, file_hash, read_cache, write_cache
+from okc_analysis.team_context import TEAM_FEATURE_COLUMNS, TeamContext, team_features
+
+# Bump whenever the feature definitions change, so stale caches are rebuilt
+FEATURE_VERSION = 2
+
+TOTAL_STATS = ['games', 'games_start', 'mins', 'points', 'fgm', 'fga', 'fgm3', 'fga3', 'ftm', 'fta',
+               'off_reb', 'def_reb', 'tot_reb', 'ast', 'steals', 'blocks', 'tov', 'tot_fouls']
+PER_36_STATS = ['points', 'fga', 'fga3', 'fta', 'off_reb', 'def_reb', 'ast', 'steals', 'blocks', 'tov', 'tot_fouls']
+WEIGHTED_STATS = ['PER', 'BPM', 'OBPM', 'DBPM', 'usg', 'efg', 'ast_pct', 'tot_reb_pct']
+SUMMED_ADVANCED = ['WS', 'OWS', 'DWS', 'VORP']
+EARLY_AWARDS = {
+    'all_rookie': ['All Rookie First Team', 'All Rookie Second Team'],
+    'all_star': ['all_star_game'],
+    'all_nba': ['All NBA First Team', 'All NBA Second Team', 'All NBA Third Team'],
+}
+
+FEATURE_COLUMNS = (
+    ['seasons_played', 'draftpick', 'undrafted']
+    + [f'total_{stat}' for stat in TOTAL_STATS]
+    + [f'{stat}_per_game' for stat in ['mins', 'points', 'tot_reb', 'ast']]
+    + [f'{stat}_per_36' for stat in PER_36_STATS]
+    + WEIGHTED_STATS + SUMMED_ADVANCED
+    + [f'early_{award}' for award in EARLY_AWARDS] + ['roy_votes']
+    + TEAM_FEATURE_COLUMNS
+)
+
+
+# Feature matrix indexed by nbapersonid, from each player's first `first_n` seasons after the draft
+def player_features(player_stats, awards_data, context, first_n=4):
+    keys = ['season', 'nbapersonid']
+    early = player_stats[(player_stats['season'] >= player_stats['draftyear']) &
+                         (player_stats['season'] < player_stats['draftyear'] + first_n)]
+
+    # Collapse awards to one row per player-season before joining, then flag the early ones
+    award_columns = [column for columns in EARLY_AWARDS.values() for column in columns]
+    awards = awards_data.dropna(subset=['nbapersonid'])
+    awards = awards.groupby(keys).agg({**{column: 'any' for column in award_columns}, 'Rookie Of The Year_rk': 'min'})
+    early = early.join(awards, on=keys)
+
+    # Everything below is a column-wise sum, so one groupby covers all of it
+    sums = pd.DataFrame({
+        **{f'total_{stat}': early[stat] for stat in TOTAL_STATS},
+        **{f'weighted_{stat}': early[stat].astype(float) * early['mins'] for stat in WEIGHTED_STATS},
+        **{stat: early[stat] for stat in SUMMED_ADVANCED},
+        **{f'early_{award}': early[columns].eq(True).any(axis=1) for award, columns in EARLY_AWARDS.items()},
+        'roy_votes': early['Rookie Of The Year_rk'].notna(),
+        'weighted_minutes': early['mins'].where(early[WEIGHTED_STATS].notna().all(axis=1), 0),
+    })
+    grouped = sums.groupby(early['nbapersonid'])
+    totals = grouped.sum()
+    totals['seasons_played'] = early.groupby('nbapersonid')['season'].nunique()
+
+    features = pd.DataFrame(index=totals.index)
+    features['seasons_played'] = totals['seasons_played']
+    draft = player_stats.drop_duplicates('nbapersonid').set_index('nbapersonid')
+    features['draftpick'] = draft['draftpick'].reindex(features.index).astype(float)
+    features['undrafted'] = features['draftpick'].isna().astype(float)
+
+    for stat in TOTAL_STATS:
+        features[f'total_{stat}'] = totals[f'total_{stat}']
+    games = totals['total_games'].replace(0, np.nan)
+    for stat in ['mins', 'points', 'tot_reb', 'ast']:
+        features[f'{stat}_per_game'] = totals[f'total_{stat}'] / games
+    minutes = totals['total_mins'].replace(0, np.nan)
+    for stat in PER_36_STATS:
+        features[f'{stat}_per_36'] = totals[f'total_{stat}'] / minutes * 36
+    weighted_minutes = totals['weighted_minutes'].replace(0, np.nan)
+    for stat in WEIGHTED_STATS:
+        features[stat] = totals[f'weighted_{stat}'] / weighted_minutes
+    for stat in SUMMED_ADVANCED:
+        features[stat] = totals[stat]
+    for award in EARLY_AWARDS:
+        features[f'early_{award}'] = totals[f'early_{award}'].gt(0).astype(float)
+    features['roy_votes'] = totals['roy_votes'].gt(0).astype(float)
+    features = features.join(team_features(player_stats, context, first_n=first_n))
+
+    features = features[FEATURE_COLUMNS].astype('float32')
+    features.insert(0, 'draftyear', draft['draftyear'].reindex(features.index))
+    features.insert(0, 'player', draft['player'].reindex(features.index))
+    return features
+
+
+# Fingerprint of the feature definition, shared by every cache that holds the feature matrix
+def feature_definition():
+    return hashlib.sha256(repr((FEATURE_VERSION, FEATURE_COLUMNS)).encode()).hexdigest()
+
+
+def feature_cache_key(data_dir, first_n):
+    hashes = {name: file_hash(os.path.join(data_dir, DATASETS[name])) for name in ('player_stats', 'awards_data', 'team_stats')}
+    return {**hashes, 'definition': feature_definition(), 'first_n': first_n}
+
+
+# Cached feature matrix for the CSVs in data_dir; rebuilt only when an input or the definition changes
+def load_player_features(first_n=4, data_dir=None, cache_dir=None):
+    from okc_analysis.loader import load_datasets
+
+    data_dir = data_dir or DATA_DIR
+    cache_dir = cache_dir or os.path.join(data_dir, '.cache')
+    data_path, meta_path = cache_paths(f'player_features_{first_n}', cache_dir)
+
+    key = feature_cache_key(data_dir, first_n)
+    if os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == key:
+                return read_cache(data_path).set_index('nbapersonid')
+
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=data_dir, cache_dir=cache_dir)
+    features = player_features(player_stats, awards_data, TeamContext.build(team_stats), first_n=first_n)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_cache(features.reset_index(), data_path, meta_path, key)
+    return features
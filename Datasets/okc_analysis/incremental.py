@@ -0,0 +1,216 @@
+# Objective:
+# Refresh the derived results incrementally when a season is appended
+#   - Fingerprint every (season, nbapersonid) key of player_stats and
+#     awards_data, and compare with the fingerprints saved by the last run
+#     to find the new, changed and removed player-seasons
+#   - Per-player results (career outcomes, milestones, feature vectors) are
+#     recomputed only for the players behind those keys
+#   - Per-season results (tier totals, and the per-player tier rows they
+#     are summed from) are recomputed only for the seasons behind those keys
+#   - The partial results are merged into the saved ones and written back,
+#     so a seasonal refresh costs time proportional to the new data
+#   - A change to team_stats (season lengths and team context), to this
+#     module's version, or to the feature / outcome definitions starts over
+#     with a full rebuild
+#
+# Run `python -m okc_analysis.incremental` from the Datasets folder to refresh
+# the saved results and print what was recomputed.
+
+import json
+import os
+import time
+
+import pandas as pd
+
+from okc_analysis.features import feature_definition, player_features
+from okc_analysis.loader import DATA_DIR, DATASETS, cache_paths, file_hash, load_datasets, read_cache, write_cache
+from okc_analysis.milestones import first_milestone_seasons
+from okc_analysis.team_context import TeamContext
+from okc_analysis.outcomes import classify_career_outcomes, outcome_definition
+from okc_analysis.tiers import tier_player_seasons, tier_season_totals
+
+# Bump whenever a result definition changes, so saved results are rebuilt from scratch
+INCREMENTAL_VERSION = 3
+KEYS = ['season', 'nbapersonid']
+
+
+# Per-player results: name -> function(player_stats, awards_data, team_context) indexed by nbapersonid
+def compute_career_outcomes(player_stats, awards_data, context):
+    return classify_career_outcomes(player_stats, awards_data, season_lengths=context.season_lengths()).to_frame()
+
+
+def compute_milestones(player_stats, awards_data, context):
+    return first_milestone_seasons(player_stats, awards_data)
+
+
+def compute_player_features(player_stats, awards_data, context):
+    return player_features(player_stats, awards_data, context)
+
+
+PLAYER_RESULTS = {
+    'career_outcomes': compute_career_outcomes,
+    'milestones': compute_milestones,
+    'player_features': compute_player_features,
+}
+
+
+# Per-season results: name -> function(player_stats, awards_data) with a 'season' index level
+def compute_tier_totals(player_stats, awards_data):
+    return tier_season_totals(player_stats, awards_data, stats=['points', 'games'])
+
+
+def compute_tier_players(player_stats, awards_data):
+    return tier_player_seasons(player_stats, awards_data, stats=['points', 'games'])
+
+
+SEASON_RESULTS = {
+    'tier_totals': compute_tier_totals,
+    'tier_players': compute_tier_players,
+}
+
+# Index columns of each per-season result when it is read back
+SEASON_INDEX = {
+    'tier_totals': ['season', 'tier'],
+    'tier_players': ['season', 'tier', 'nbapersonid'],
+}
+
+
+# One hash per (season, nbapersonid), combining every row with that key
+# (traded players have one row per team; the sum doesn't depend on row order)
+def key_fingerprints(frame):
+    rows = frame.dropna(subset=['nbapersonid'])
+    hashes = pd.util.hash_pandas_object(rows, index=False)
+    return hashes.groupby([rows['season'].astype('int64'), rows['nbapersonid'].astype('int64')]).sum()
+
+
+def fingerprints(player_stats, awards_data):
+    return pd.DataFrame({
+        'player_stats': key_fingerprints(player_stats),
+        'awards_data': key_fingerprints(awards_data),
+    }).rename_axis(KEYS).fillna(0).astype('uint64')
+
+
+# Keys that were added, removed or changed between two fingerprint tables
+def changed_keys(old, new):
+    old, new = old.align(new, join='outer', fill_value=0)
+    return new.index[(old != new).any(axis=1)]
+
+
+def state_key(data_dir):
+    return {
+        'version': INCREMENTAL_VERSION,
+        'team_stats': file_hash(os.path.join(data_dir, DATASETS['team_stats'])),
+        'features': feature_definition(),
+        'outcomes': outcome_definition(),
+    }
+
+
+def save_results(results, state_dir, key):
+    os.makedirs(state_dir, exist_ok=True)
+    for name, frame in results.items():
+        data_path, meta_path = cache_paths(name, state_dir)
+        write_cache(frame.reset_index(), data_path, meta_path, key)
+
+
+# Saved results, or None when any of them is missing or was saved under a different key
+def load_results(state_dir, key, index_columns):
+    results = {}
+    for name, columns in index_columns.items():
+        data_path, meta_path = cache_paths(name, state_dir)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) != key:
+                return None
+        results[name] = read_cache(data_path).set_index(columns)
+    return results
+
+
+def full_results(player_stats, awards_data, context):
+    results = {name: compute(player_stats, awards_data, context) for name, compute in PLAYER_RESULTS.items()}
+    results.update({name: compute(player_stats, awards_data) for name, compute in SEASON_RESULTS.items()})
+    return results
+
+
+# Saved rows plus the recomputed ones; empty frames (e.g. nothing left of a removed
+# player) are left out, since pandas deprecates concatenating them
+def merge_partial(kept, partial):
+    frames = [frame for frame in (kept, partial) if len(frame)]
+    return pd.concat(frames).sort_index() if frames else kept
+
+
+# Recompute only what the changed keys touch and merge it into the saved results
+def update_results(results, player_stats, awards_data, context, changed):
+    players = changed.get_level_values('nbapersonid').unique()
+    seasons = changed.get_level_values('season').unique()
+    updated = {}
+
+    player_rows = player_stats[player_stats['nbapersonid'].isin(players)]
+    player_awards = awards_data[awards_data['nbapersonid'].isin(players)]
+    for name, compute in PLAYER_RESULTS.items():
+        kept = results[name].drop(players, errors='ignore')
+        updated[name] = merge_partial(kept, compute(player_rows, player_awards, context))
+
+    season_rows = player_stats[player_stats['season'].isin(seasons)]
+    season_awards = awards_data[awards_data['season'].isin(seasons)]
+    for name, compute in SEASON_RESULTS.items():
+        kept = results[name][~results[name].index.get_level_values('season').isin(seasons)]
+        updated[name] = merge_partial(kept, compute(season_rows, season_awards))
+    return updated
+
+
+# Bring the saved results up to date with the current data and return them,
+# along with a summary of what had to be recomputed
+def refresh(player_stats, awards_data, team_stats, data_dir=None, state_dir=None):
+    data_dir = data_dir or DATA_DIR
+    state_dir = state_dir or os.path.join(data_dir, '.cache', 'incremental')
+    key = state_key(data_dir)
+    context = TeamContext.build(team_stats)
+    new_fingerprints = fingerprints(player_stats, awards_data)
+
+    index_columns = {name: ['nbapersonid'] for name in PLAYER_RESULTS}
+    index_columns.update(SEASON_INDEX)
+    index_columns['fingerprints'] = KEYS
+    saved = load_results(state_dir, key, index_columns)
+
+    if saved is None:
+        results = full_results(player_stats, awards_data, context)
+        summary = {'mode': 'full', 'changed_keys': len(new_fingerprints)}
+    else:
+        changed = changed_keys(saved.pop('fingerprints'), new_fingerprints)
+        if len(changed) == 0:
+            return saved, {'mode': 'unchanged', 'changed_keys': 0}
+        results = update_results(saved, player_stats, awards_data, context, changed)
+        summary = {
+            'mode': 'incremental',
+            'changed_keys': len(changed),
+            'players': changed.get_level_values('nbapersonid').nunique(),
+            'seasons': sorted(changed.get_level_values('season').unique().tolist()),
+        }
+
+    save_results({**results, 'fingerprints': new_fingerprints}, state_dir, key)
+    return results, summary
+
+
+# Load the datasets and return the up-to-date results (career_outcomes,
+# milestones, player_features, tier_totals, tier_players). The results are
+# saved under cache_dir when one is given.
+def refreshed_results(data_dir=None, cache_dir=None):
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats',
+                                                          data_dir=data_dir, cache_dir=cache_dir)
+    state_dir = os.path.join(cache_dir, 'incremental') if cache_dir else None
+    results, _ = refresh(player_stats, awards_data, team_stats, data_dir=data_dir, state_dir=state_dir)
+    return results
+
+
+if __name__ == '__main__':
+    player_stats, awards_data, team_stats = load_datasets('player_stats', 'awards_data', 'team_stats')
+    start = time.perf_counter()
+    results, summary = refresh(player_stats, awards_data, team_stats)
+    elapsed = time.perf_counter() - start
+
+    print(f"Refresh ({summary['mode']}) in {elapsed:.3f}s: {summary['changed_keys']} player-seasons changed")
+    if summary['mode'] == 'incremental':
+        print(f"Recomputed {summary['players']} players and seasons {summary['seasons']}")
+    for name, frame in results.items():
+        print(f"  {name}: {len(frame)} rows")
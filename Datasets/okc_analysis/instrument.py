@@ -0,0 +1,138 @@
+# Objective:
+# Lightweight timing and memory instrumentation of named stages
+#   - Scripts wrap each stage (load, filter, join, classify, aggregate, fit,
+#     predict, render) in `with stage('name') as trace:` and may set
+#     trace['rows'] to the number of rows the stage produced
+#   - Off by default and close to free when off. Switch it on with
+#     OKC_TRACE=1 (or --trace on a script or the CLI) to record wall time, CPU time and peak
+#     traced memory per stage; the trace is written as JSON and CSV to the
+#     traces folder when the script exits
+#   - OKC_PROFILE=1 (or --profile) also dumps a cProfile file per stage,
+#     e.g. `python -m pstats traces/part1_question3_classify.prof`
+#   - Peak memory comes from tracemalloc, which slows allocation-heavy
+#     stages down a little while tracing is on
+#   - The flags are parsed by the entry point (see render.parse_script_args
+#     and cli.main), which passes them to configure()
+
+import atexit
+import cProfile
+import csv
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# The Datasets folder (not imported from loader.py, which is instrumented itself)
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PROFILE = os.environ.get('OKC_PROFILE', '') not in ('', '0')
+ENABLED = os.environ.get('OKC_TRACE', '') not in ('', '0') or PROFILE
+TRACE_DIR = os.environ.get('OKC_TRACE_DIR', os.path.join(DATA_DIR, 'traces'))
+TRACE_FIELDS = ['stage', 'parent', 'rows', 'wall_seconds', 'cpu_seconds', 'peak_mib', 'profile']
+
+_records = []
+_open_stages = []
+
+
+# Script name, or the package name for `python -m okc_analysis`
+def run_name():
+    script = sys.argv[0] or 'interactive'
+    if os.path.basename(script) == '__main__.py':
+        script = os.path.dirname(script)
+    return os.path.splitext(os.path.basename(script))[0].lower()
+
+
+@contextmanager
+def stage(name, rows=None):
+    trace = {'stage': name, 'parent': _open_stages[-1]['name'] if _open_stages else None, 'rows': rows}
+    if not ENABLED:
+        yield trace
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif _open_stages:
+        # Resetting the peak below would hide what the enclosing stage has used so far
+        outer = _open_stages[-1]
+        outer['peak_bytes'] = max(outer['peak_bytes'], tracemalloc.get_traced_memory()[1])
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    # Only one profiler can be active at a time, so nested stages are profiled as part of the outer one
+    profiler = cProfile.Profile() if PROFILE and not any(outer['profiled'] for outer in _open_stages) else None
+    state = {'name': name, 'peak_bytes': 0, 'profiled': profiler is not None}
+    _open_stages.append(state)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    if profiler:
+        profiler.enable()
+    try:
+        yield trace
+    finally:
+        if profiler:
+            profiler.disable()
+        trace['wall_seconds'] = time.perf_counter() - wall
+        trace['cpu_seconds'] = time.process_time() - cpu
+        peak = max(state['peak_bytes'], tracemalloc.get_traced_memory()[1])
+        trace['peak_mib'] = max(peak - baseline, 0) / 2**20
+        _open_stages.pop()
+        if started_tracing:
+            tracemalloc.stop()
+        if profiler:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            trace['profile'] = os.path.join(TRACE_DIR, f'{run_name()}_{name}.prof')
+            profiler.dump_stats(trace['profile'])
+        _records.append(trace)
+
+
+def records():
+    return list(_records)
+
+
+# Write everything recorded so far to <trace_dir>/<script>_<timestamp>.json/.csv
+def write_traces(trace_dir=TRACE_DIR):
+    if not _records:
+        return None
+    os.makedirs(trace_dir, exist_ok=True)
+    started = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    path_base = os.path.join(trace_dir, f'{run_name()}_{started}')
+
+    with open(path_base + '.json', 'w', encoding='utf-8') as f:
+        json.dump({'run': run_name(), 'argv': sys.argv, 'written_at': started, 'stages': _records}, f, indent=2)
+    with open(path_base + '.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(_records)
+    return path_base
+
+
+def summary():
+    lines = [f"{'stage':<36}{'rows':>10}{'wall s':>10}{'cpu s':>10}{'peak MiB':>10}"]
+    for trace in _records:
+        rows = '' if trace['rows'] is None else trace['rows']
+        label = trace['stage'] if trace['parent'] is None else f"{trace['parent']} > {trace['stage']}"
+        lines.append(f"{label:<36}{rows:>10}{trace['wall_seconds']:>10.3f}"
+                     f"{trace['cpu_seconds']:>10.3f}{trace['peak_mib']:>10.1f}")
+    return '\n'.join(lines)
+
+
+def _write_at_exit():
+    path_base = write_traces()
+    if path_base:
+        print(f"\n------- Stage trace -------\n{summary()}\nTrace written to {path_base}.json/.csv", file=sys.stderr)
+
+
+# Switch tracing / profiling on for the rest of the run (on top of the environment variables)
+def configure(trace=False, profile=False):
+    global ENABLED, PROFILE
+    PROFILE = PROFILE or profile
+    if (trace or PROFILE) and not ENABLED:
+        ENABLED = True
+        atexit.register(_write_at_exit)
+
+
+if ENABLED:
+    atexit.register(_write_at_exit)
@@ -0,0 +1,135 @@
+# Objective:
+# Load the project datasets from a binary columnar cache instead of
+# re-parsing the CSV files on every run
+#   - Each CSV is converted once into .cache/<name>.feather (pyarrow) and
+#     rebuilt only when the source file's hash changes
+#   - Feather files are written uncompressed and read memory-mapped, so
+#     several analysis processes can share the same pages
+#   - Without pyarrow the cache falls back to pickle, which still skips
+#     the CSV parsing and dtype inference
+#   - Datasets with a declared schema (see schema.py) are validated and
+#     stored with their compact dtypes, and the cache is rebuilt whenever
+#     that schema changes
+#   - load_datasets() reads several datasets in a thread pool: hashing the
+#     CSVs and reading feather / CSV files mostly run outside the GIL
+
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from okc_analysis import instrument
+from okc_analysis.instrument import stage
+from okc_analysis.schema import SCHEMAS, apply_schema
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional
+    feather = None
+
+# Folder holding the CSV files (the Datasets folder)
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DATASETS = {
+    'player_stats': 'player_stats.csv',
+    'awards_data': 'awards_data.csv',
+    'team_stats': 'team_stats.csv',
+    'team_rebounding_data': 'team_rebounding_data_22.csv',
+}
+
+
+# Hash the source CSV in chunks so large histories don't have to fit in memory twice
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(name, cache_dir):
+    suffix = '.feather' if feather is not None else '.pkl'
+    return os.path.join(cache_dir, name + suffix), os.path.join(cache_dir, name + '.json')
+
+
+# Fingerprint of the CSV contents plus the declared schema, so either one changing rebuilds the cache
+def cache_key(csv_path, name):
+    schema = SCHEMAS.get(name)
+    schema_hash = hashlib.sha256(repr(schema).encode()).hexdigest() if schema else None
+    return {'sha256': file_hash(csv_path), 'schema': schema_hash}
+
+
+# Write through a temporary file of this writer's own in the same folder, then rename it
+# into place, so concurrent rebuilds never share a temp file and a crash never leaves a half-written file
+def replace_atomically(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def write_json(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f)
+
+
+# The data goes first: until the new meta file replaces the old one, the old key no longer matches
+# and the cache is rebuilt rather than read
+def write_cache(frame, data_path, meta_path, key):
+    if feather is not None:
+        replace_atomically(data_path, lambda path: feather.write_feather(frame, path, compression='uncompressed'))
+    else:
+        replace_atomically(data_path, frame.to_pickle)
+    replace_atomically(meta_path, lambda path: write_json(path, key))
+
+
+def read_cache(data_path):
+    if feather is not None:
+        return feather.read_feather(data_path, memory_map=True)
+    return pd.read_pickle(data_path)
+
+
+# Load one dataset by name, (re)building its cache if the CSV changed
+def load_dataset(name, data_dir=None, cache_dir=None):
+    with stage(f'load_{name}') as trace:
+        frame = load_or_build_cache(name, data_dir or DATA_DIR, cache_dir)
+        trace['rows'] = len(frame)
+    return frame
+
+
+def load_or_build_cache(name, data_dir, cache_dir=None):
+    cache_dir = cache_dir or os.path.join(data_dir, '.cache')
+    csv_path = os.path.join(data_dir, DATASETS[name])
+    data_path, meta_path = cache_paths(name, cache_dir)
+
+    key = cache_key(csv_path, name)
+    if os.path.exists(data_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            if json.load(f) == key:
+                return read_cache(data_path)
+
+    frame = pd.read_csv(csv_path)
+    if name in SCHEMAS:
+        frame = apply_schema(frame, SCHEMAS[name])
+    os.makedirs(cache_dir, exist_ok=True)
+    write_cache(frame, data_path, meta_path, key)
+    return frame
+
+
+# Load several datasets at once, e.g. load_datasets('player_stats', 'awards_data').
+# Traced runs load them one after another so every load_<name> stage is timed on its own.
+def load_datasets(*names, data_dir=None, cache_dir=None):
+    def load(name):
+        return load_dataset(name, data_dir=data_dir, cache_dir=cache_dir)
+
+    if len(names) < 2 or instrument.ENABLED:
+        return [load(name) for name in names]
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        return list(pool.map(load, names))
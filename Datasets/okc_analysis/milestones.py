@@ -0,0 +1,68 @@
+# Objective:
+# Time to first milestone for every player and every award tier
+#   - Find the first season each player reached each award tier in one
+#     grouped pass over awards_data (the file isn't sorted by season, so
+#     this takes the minimum season rather than the first row seen)
+#   - Convert those seasons into years since the player's draft
+#   - Average the years of experience by first-selection season, counting
+#     each player once per tier instead of once per season played
+
+import pandas as pd
+
+
+# Build a tier that checks for a top-n finish in a voting rank column
+def top_n(rank_column, n):
+    return lambda awards: awards[rank_column].le(n).fillna(False).astype(bool)
+
+
+# Tier name -> function returning a boolean mask over awards_data rows
+MILESTONE_TIERS = {
+    'All NBA': lambda awards: awards[['All NBA First Team', 'All NBA Second Team', 'All NBA Third Team']].any(axis=1),
+    'All NBA First Team': lambda awards: awards['All NBA First Team'],
+    'All NBA Second Team': lambda awards: awards['All NBA Second Team'],
+    'All NBA Third Team': lambda awards: awards['All NBA Third Team'],
+    'All-Star': lambda awards: awards['all_star_game'],
+    'All-Defensive': lambda awards: awards[['All NBA Defensive First Team', 'All NBA Defensive Second Team']].any(axis=1),
+    'MVP Top 5': top_n('Most Valuable Player_rk', 5),
+    'Rookie Of The Year': top_n('Rookie Of The Year_rk', 1),
+}
+
+
+# First season each player reached each tier (missing if never reached),
+# alongside the player's draft year
+def first_milestone_seasons(player_stats, awards_data, tiers=None):
+    tiers = tiers or MILESTONE_TIERS
+
+    # Season where the tier was reached, missing everywhere else, so a single
+    # groupby min gives the first season for every tier at once
+    reached = pd.DataFrame({tier: tier_mask(awards_data) for tier, tier_mask in tiers.items()})
+    seasons = reached.mul(awards_data['season'], axis=0).where(reached)
+    first_seasons = seasons.groupby(awards_data['nbapersonid']).min()
+
+    draft_years = player_stats.groupby('nbapersonid')['draftyear'].first()
+    milestones = first_seasons.join(draft_years, how='inner')
+    return milestones[['draftyear'] + list(tiers)]
+
+
+# Years between the draft and the first season of each tier
+def years_to_milestones(milestones):
+    tiers = milestones.columns.drop('draftyear')
+    return milestones[tiers].sub(milestones['draftyear'], axis=0)
+
+
+# One row per (player, tier reached): the first season and the years of experience it took
+def first_milestone_years(milestones):
+    years = years_to_milestones(milestones)
+    first = milestones[years.columns].stack().rename('first_season')
+    experience = years.stack().rename('years_of_experience')
+    return pd.concat([first, experience], axis=1).dropna().reset_index(level=1, names=['nbapersonid', 'tier'])
+
+
+# Average years of experience to reach each tier, by the season it was first reached.
+# Returns one row per season and one column per tier.
+def experience_by_first_season(milestones):
+    tiers = milestones.columns.drop('draftyear')
+    long = first_milestone_years(milestones)
+    averages = long.groupby(['first_season', 'tier'])['years_of_experience'].mean().unstack('tier')
+    averages.index = averages.index.astype(int)
+    return averages.reindex(columns=tiers)
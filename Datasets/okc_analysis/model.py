@@ -0,0 +1,183 @@
+# Objective:
+# Career outcome model that is trained once, saved as a versioned artifact,
+# and reused to score any draft class without retraining
+#   - One row per player: the cached first-four-season feature vectors from
+#     features.py (team context included), labelled with the player's career outcome
+#   - The imputer, scaler and logistic regression are one sklearn Pipeline
+#   - score_players() loads the artifact once and scores every requested
+#     player in a single predict_proba call, returning the probability of
+#     every career outcome (not only the most likely one)
+#   - scikit-learn and joblib are imported by the functions that fit,
+#     save or load a model, so importing FEATURES / TARGET stays cheap
+#
+# From the Datasets folder:
+#   python -m okc_analysis.model train
+#   python -m okc_analysis.model score --draft-years 2018 2019 2020 2021 --output scores.csv
+
+import argparse
+import datetime
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+from okc_analysis.features import FEATURE_COLUMNS
+from okc_analysis.loader import DATA_DIR, DATASETS, file_hash, replace_atomically
+from okc_analysis.outcomes import OUTCOME_ORDER, classify_career_outcomes
+
+# Bump whenever the features or the pipeline change, so old artifacts aren't loaded by mistake
+MODEL_VERSION = 4
+MODEL_DIR = os.path.join(DATA_DIR, 'models')
+MODEL_PATH = os.path.join(MODEL_DIR, f'career_outcome_v{MODEL_VERSION}.joblib')
+
+FEATURES = FEATURE_COLUMNS
+TARGET = 'career_outcome'
+
+
+def build_pipeline(max_iter=1000):
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    return Pipeline([
+        ('imputer', SimpleImputer(strategy='mean')),
+        ('scaler', StandardScaler()),
+        ('model', LogisticRegression(max_iter=max_iter, random_state=42)),
+    ])
+
+
+# Feature vectors of players drafted between `first_draft_year` and `last_draft_year`,
+# labelled with their career outcome. The stats start in 2007, so earlier draft
+# classes have no first four seasons to build features from.
+def training_data(player_stats, awards_data, features, first_draft_year=2007, last_draft_year=2015,
+                  season_lengths=None):
+    drafted = player_stats[player_stats['draftyear'].between(first_draft_year, last_draft_year)]
+    career_outcomes = classify_career_outcomes(drafted, awards_data, games_col='games', minutes_col='mins',
+                                               season_lengths=season_lengths)
+    train_data = features.join(career_outcomes, how='inner')
+    return train_data.rename_axis('nbapersonid').reset_index()
+
+
+# Fit on an 80/20 split of the labelled players and return the pipeline and its holdout accuracy
+def train_model(train_data, max_iter=1000):
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+
+    X_train, X_test, y_train, y_test = train_test_split(train_data[FEATURES], train_data[TARGET],
+                                                        test_size=0.2, random_state=42)
+    pipeline = build_pipeline(max_iter=max_iter)
+    pipeline.fit(X_train, y_train)
+    accuracy = accuracy_score(y_test, pipeline.predict(X_test))
+    return pipeline, accuracy
+
+
+# Hash of the training CSVs, stored with the artifact so a data change triggers a retrain
+def training_data_hash(data_dir=DATA_DIR):
+    return '-'.join(file_hash(os.path.join(data_dir, DATASETS[name]))
+                    for name in ('player_stats', 'awards_data', 'team_stats'))
+
+
+def save_model(pipeline, path=MODEL_PATH, data_dir=DATA_DIR, **metadata):
+    import joblib
+    import sklearn
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    artifact = {
+        'version': MODEL_VERSION,
+        'pipeline': pipeline,
+        'features': FEATURES,
+        'classes': list(pipeline.classes_),
+        'sklearn_version': sklearn.__version__,
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'data_hash': training_data_hash(data_dir),
+        **metadata,
+    }
+    replace_atomically(path, lambda tmp_path: joblib.dump(artifact, tmp_path))
+    return artifact
+
+
+# Loaded once per process; later calls reuse the same pipeline
+@lru_cache(maxsize=None)
+def load_model(path=MODEL_PATH):
+    import joblib
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No trained model at {path}, run `python -m okc_analysis.model train` first")
+    artifact = joblib.load(path)
+    if artifact.get('version') != MODEL_VERSION:
+        raise ValueError(f"{path} is model version {artifact.get('version')}, expected {MODEL_VERSION}")
+    return artifact
+
+
+# Reuse the saved artifact when it was trained on the current data, otherwise train and save a new one
+def load_or_train(player_stats, awards_data, features, season_lengths=None, max_iter=1000, path=MODEL_PATH,
+                  data_dir=DATA_DIR):
+    try:
+        artifact = load_model(path)
+        if artifact.get('data_hash') == training_data_hash(data_dir):
+            return artifact
+    except FileNotFoundError:
+        pass
+
+    train_data = training_data(player_stats, awards_data, features, season_lengths=season_lengths)
+    pipeline, accuracy = train_model(train_data, max_iter=max_iter)
+    artifact = save_model(pipeline, path, data_dir, accuracy=accuracy)
+    load_model.cache_clear()
+    return artifact
+
+
+# Probability of every career outcome for each player in the feature matrix.
+# Select players by draft year and/or player id.
+def score_players(features, draft_years=None, player_ids=None, artifact=None):
+    artifact = artifact or load_model()
+    rows = features.rename_axis('nbapersonid').reset_index()
+    if draft_years is not None:
+        rows = rows[rows['draftyear'].isin(list(draft_years))]
+    if player_ids is not None:
+        rows = rows[rows['nbapersonid'].isin(list(player_ids))]
+
+    pipeline = artifact['pipeline']
+    probabilities = pd.DataFrame(pipeline.predict_proba(rows[artifact['features']]),
+                                 columns=pipeline.classes_, index=rows.index)
+    probabilities = probabilities.reindex(columns=OUTCOME_ORDER, fill_value=0.0)
+
+    scores = rows[['nbapersonid', 'player', 'draftyear', 'draftpick']].copy()
+    scores['draftpick'] = scores['draftpick'].astype('Int8')
+    scores['predicted_outcome'] = probabilities.idxmax(axis=1)
+    scores = pd.concat([scores, probabilities], axis=1)
+    return scores.sort_values(['draftyear', 'draftpick', 'player'], ignore_index=True)
+
+
+def main(argv=None):
+    from okc_analysis.features import load_player_features
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.normalization import load_season_lengths
+
+    parser = argparse.ArgumentParser(description='Train or score the career outcome model')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('train', help='fit the pipeline and save the artifact')
+    score = commands.add_parser('score', help='score draft classes or players with the saved artifact')
+    score.add_argument('--draft-years', type=int, nargs='+')
+    score.add_argument('--player-ids', type=int, nargs='+')
+    score.add_argument('--output', help='write the probability table to this CSV file')
+    args = parser.parse_args(argv)
+
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data')
+    features = load_player_features()
+    if args.command == 'train':
+        train_data = training_data(player_stats, awards_data, features, season_lengths=load_season_lengths())
+        pipeline, accuracy = train_model(train_data)
+        save_model(pipeline, accuracy=accuracy)
+        load_model.cache_clear()
+        print(f"Model Accuracy: {accuracy:.2%}\nSaved {MODEL_PATH}")
+    else:
+        scores = score_players(features, draft_years=args.draft_years, player_ids=args.player_ids)
+        if args.output:
+            scores.to_csv(args.output, index=False)
+        else:
+            print(scores.to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# Objective:
+# Rescale counting stats from shortened seasons to a full 82-game schedule
+#   - The schedule length of every season comes from team_stats.csv (the
+#     most games any team played that season), so the 2011 lockout and the
+#     2019/2020 seasons are handled without hard-coding years. It is read
+#     off the dense team/season table in team_context.py, the same lookup
+#     that gives the modeling features their team context
+#   - Rows are matched to their season's factor with one vectorized lookup,
+#     so any set of columns is rescaled with plain array math
+#   - Shared by Part1_Question3, OpenMinded (through the outcome labels)
+#     and the chart renderer, so every outcome uses the same thresholds
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.loader import load_dataset
+from okc_analysis.team_context import TeamContext
+
+FULL_SEASON = 82
+
+
+# Games in each season's schedule (indexed by season)
+def season_lengths(team_stats):
+    return TeamContext.build(team_stats).season_lengths()
+
+
+def load_season_lengths(data_dir=None, cache_dir=None):
+    return season_lengths(load_dataset('team_stats', data_dir=data_dir, cache_dir=cache_dir))
+
+
+# Factor that scales each season onto a full schedule (1 for seasons missing from the table)
+def season_factors(seasons, lengths, full_season=FULL_SEASON):
+    factors = np.append(full_season / lengths.to_numpy(float), 1.0)
+    positions = pd.Index(lengths.index).get_indexer(np.asarray(seasons))
+    return factors[positions]  # -1 (unknown season) picks the trailing 1.0
+
+
+# Rescaled copies of `columns`, rounded back to whole games / minutes
+def normalize_counts(frame, columns, lengths, full_season=FULL_SEASON):
+    factors = season_factors(frame['season'], lengths, full_season)
+    return pd.DataFrame({column: np.round(frame[column].to_numpy(float) * factors) for column in columns},
+                        index=frame.index)
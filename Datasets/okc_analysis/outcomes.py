@@ -0,0 +1,101 @@
+# Objective:
+# Career outcome classification shared by Part1_Question3 and OpenMinded
+#   1. Elite (Won any All NBA 1st, 2nd, 3rd, MVP, or DPOY)
+#   2. All-Star (Selected as All-Star)
+#   3. Starter (Started at least 41 games or played 2000 minutes)
+#   4. Rotation (Played at least 1000 minutes)
+#   5. Roster (Played at least one minute, but not met any of the top 4 outcomes)
+#   6. Out of league (No longer in the NBA)
+#
+# Every player is labelled in one grouped pass instead of re-filtering the
+# merged frame once per player-season row, so the cost grows linearly with
+# the number of rows.
+#
+# The thresholds are for a full 82-game season. Pass `season_lengths` (see
+# normalization.py) to rescale games / minutes from shortened seasons first.
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.normalization import normalize_counts
+
+# Best outcome first
+OUTCOME_ORDER = ['Elite', 'All-Star', 'Starter', 'Rotation', 'Roster', 'Out of the League']
+# Ordered worst to best, so comparisons and max() follow the tiers rather than the alphabet
+OUTCOME_DTYPE = pd.CategoricalDtype(OUTCOME_ORDER[::-1], ordered=True)
+
+# Bump whenever the thresholds or the classification change, so cached outcomes are rebuilt
+OUTCOME_VERSION = 1
+# Default evaluation window (first and last season counted)
+EVALUATION_WINDOW = (2015, 2021)
+
+ALL_NBA_COLUMNS = ['All NBA First Team', 'All NBA Second Team', 'All NBA Third Team']
+AWARD_COLUMNS = ALL_NBA_COLUMNS + ['Most Valuable Player_rk', 'Defensive Player Of The Year_rk', 'all_star_game']
+
+
+# Award flags are booleans (see schema.py), but seasons without an awards
+# row come back missing after the left merge, so only True counts
+def is_selected(values):
+    return values.eq(True)
+
+
+# Count, per player, the seasons after their first four years (inside the
+# evaluation window) that meet each outcome's criteria
+def count_outcome_seasons(player_stats, awards_data, games_col='games_start', minutes_col='mins',
+                          first_season=EVALUATION_WINDOW[0], last_season=EVALUATION_WINDOW[1],
+                          season_lengths=None):
+    stats = player_stats[['nbapersonid', 'draftyear', 'season', games_col, minutes_col]]
+    if season_lengths is not None:
+        stats = stats.assign(**normalize_counts(stats, [games_col, minutes_col], season_lengths))
+    merged_data = pd.merge(stats, awards_data[['season', 'nbapersonid'] + AWARD_COLUMNS],
+                           on=['season', 'nbapersonid'], how='left')
+
+    seasons_after_first_four = merged_data[
+        (merged_data['season'] > merged_data['draftyear'] + 3) &
+        (merged_data['season'] >= first_season) & (merged_data['season'] <= last_season)
+    ]
+
+    # Any All NBA team, any MVP votes, or winning DPOY
+    elite = (seasons_after_first_four[ALL_NBA_COLUMNS].apply(is_selected).any(axis=1) |
+             seasons_after_first_four['Most Valuable Player_rk'].fillna(0).ne(0) |
+             seasons_after_first_four['Defensive Player Of The Year_rk'].eq(1).fillna(False))
+    all_star = is_selected(seasons_after_first_four['all_star_game'])
+    starter = ((seasons_after_first_four[games_col] >= 41) |
+               (seasons_after_first_four[minutes_col] >= 2000))
+    rotation = seasons_after_first_four[minutes_col] >= 1000
+
+    flags = pd.DataFrame({
+        'elite': elite,
+        'all_star': all_star,
+        'starter': starter,
+        'rotation': rotation,
+        'roster': True,
+    })
+    counts = flags.groupby(seasons_after_first_four['nbapersonid']).sum()
+
+    # Players without a single season in the window still need a row
+    players = pd.Index(player_stats['nbapersonid'].unique(), name='nbapersonid')
+    return counts.reindex(players, fill_value=0)
+
+
+# Fingerprint of the outcome definition and default window, for caches of classified outcomes
+def outcome_definition():
+    return hashlib.sha256(repr((OUTCOME_VERSION, OUTCOME_ORDER, EVALUATION_WINDOW)).encode()).hexdigest()
+
+
+# Return the best career outcome for every player (indexed by nbapersonid, as OUTCOME_DTYPE)
+def classify_career_outcomes(player_stats, awards_data, **kwargs):
+    counts = count_outcome_seasons(player_stats, awards_data, **kwargs)
+
+    # Fetch the number of seasons to trace the player's best career outcome after their 4 years in the NBA
+    conditions = [
+        counts['elite'] >= 1,
+        counts['all_star'] >= 2,  # At least two All-Star seasons
+        counts['starter'] >= 2,
+        counts['rotation'] >= 2,
+        counts['roster'] >= 2,
+    ]
+    labels = np.select(conditions, OUTCOME_ORDER[:-1], default=OUTCOME_ORDER[-1])
+    return pd.Series(pd.Categorical(labels, dtype=OUTCOME_DTYPE), index=counts.index, name='career_outcome')
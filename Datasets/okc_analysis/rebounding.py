@@ -0,0 +1,91 @@
+# Objective:
+# Streaming next-game offensive rebounding forecasts for every team
+#   - Each team keeps a small running state: season-to-date sums, chance
+#     weighted exponential averages, and the sums of the last few games
+#   - Every game row gets the prediction made from the games before it
+#     (no leakage), then the row is folded into the team's state
+#   - New game rows can be fed in as they happen without recomputing the
+#     season
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+ESTIMATES = ['season_to_date', 'ewm', 'window']
+
+
+# Running offensive rebounding state for one team, O(1) per game
+class TeamReboundState:
+    def __init__(self, halflife, window):
+        self.decay = 0.5 ** (1 / halflife)
+        self.games = 0
+        self.rebounds = 0
+        self.chances = 0
+        self.ewm_rebounds = 0.0
+        self.ewm_chances = 0.0
+        self.recent = deque(maxlen=window)
+        self.recent_rebounds = 0
+        self.recent_chances = 0
+
+    def update(self, offensive_rebounds, off_rebound_chances):
+        self.games += 1
+        self.rebounds += offensive_rebounds
+        self.chances += off_rebound_chances
+        self.ewm_rebounds = self.decay * self.ewm_rebounds + offensive_rebounds
+        self.ewm_chances = self.decay * self.ewm_chances + off_rebound_chances
+
+        # Drop the oldest game from the window sums before the deque forgets it
+        if len(self.recent) == self.recent.maxlen:
+            old_rebounds, old_chances = self.recent[0]
+            self.recent_rebounds -= old_rebounds
+            self.recent_chances -= old_chances
+        self.recent.append((offensive_rebounds, off_rebound_chances))
+        self.recent_rebounds += offensive_rebounds
+        self.recent_chances += off_rebound_chances
+
+    # Every estimate is (offensive rebounds) / (offensive rebound chances) over its games
+    def predict(self):
+        if self.chances == 0:
+            return {estimate: np.nan for estimate in ESTIMATES}
+        return {
+            'season_to_date': self.rebounds / self.chances,
+            'ewm': self.ewm_rebounds / self.ewm_chances,
+            'window': self.recent_rebounds / self.recent_chances,
+        }
+
+
+# League-wide forecaster holding one TeamReboundState per team
+class ReboundForecaster:
+    def __init__(self, halflife=10, window=10):
+        self.halflife = halflife
+        self.window = window
+        self.teams = {}
+
+    def state(self, team):
+        if team not in self.teams:
+            self.teams[team] = TeamReboundState(self.halflife, self.window)
+        return self.teams[team]
+
+    # Prediction for a team's next game from everything seen so far
+    def predict(self, team):
+        return self.state(team).predict()
+
+    def update(self, team, offensive_rebounds, off_rebound_chances):
+        self.state(team).update(offensive_rebounds, off_rebound_chances)
+
+    # Feed game rows (team_rebounding_data columns) in order and return, for
+    # every row, the forecast made before that game was played
+    def process(self, games):
+        games = games.sort_values(['game_number', 'team'], kind='stable')
+        predictions = []
+        for team, game_number, rebounds, chances in zip(games['team'], games['game_number'],
+                                                        games['offensive_rebounds'], games['off_rebound_chances']):
+            state = self.state(team)
+            predictions.append({'team': team, 'game_number': game_number, 'prior_games': state.games,
+                                **state.predict()})
+            state.update(rebounds, chances)
+
+        predictions = pd.DataFrame(predictions, index=games.index)
+        predictions['oreb_pct'] = games['oreb_pct']
+        return predictions
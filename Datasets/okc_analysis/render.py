@@ -0,0 +1,301 @@
+# Objective:
+# Headless rendering of every chart to PNG/SVG
+#   - Scripts end with show(fig, name, data) instead of plt.show(). With
+#     OKC_HEADLESS=1 (or --headless) they switch to the non-GUI Agg
+#     backend and write the figure to the charts folder instead of opening
+#     a window
+#   - With OKC_TEXT_ONLY=1 (or --text-only) the scripts print their
+#     results and stop before drawing, so matplotlib / seaborn are never
+#     imported. This module doesn't import matplotlib itself: the headless
+#     backend is picked through MPLBACKEND until a chart needs it
+#   - The scripts parse their own flags with parse_script_args(), and check
+#     wants_chart() before plotting, so an unchanged chart isn't drawn at all
+#   - `python -m okc_analysis.render` builds the full chart set (every
+#     draft class, every team) and renders the independent figures in a
+#     process pool
+#   - Every chart is saved next to a hash of the data it was drawn from,
+#     and is skipped when that data hasn't changed. The hash covers the
+#     values and labels (pandas' own hashing, not pickle), so it survives
+#     pandas / numpy upgrades
+#   - Chart files and the hash are written through temp files and renamed
+#     into place, hash last, so an interrupted render is redrawn next time
+
+import argparse
+import hashlib
+import os
+import sys
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from okc_analysis import instrument
+from okc_analysis.instrument import stage
+from okc_analysis.loader import DATA_DIR, replace_atomically
+
+HEADLESS = os.environ.get('OKC_HEADLESS', '') not in ('', '0')
+TEXT_ONLY = os.environ.get('OKC_TEXT_ONLY', '') not in ('', '0')
+OUTPUT_DIR = os.environ.get('OKC_CHART_DIR', os.path.join(DATA_DIR, 'charts'))
+FORMATS = ('png', 'svg')
+
+# Bump to re-render everything after changing how the charts are drawn
+RENDER_VERSION = 1
+
+
+def use_agg():
+    if 'matplotlib' in sys.modules:
+        sys.modules['matplotlib'].use('Agg', force=True)
+    else:
+        # Read by matplotlib when it is first imported
+        os.environ['MPLBACKEND'] = 'Agg'
+
+
+if HEADLESS:
+    use_agg()
+
+
+def configure(headless=False, text_only=False):
+    global HEADLESS, TEXT_ONLY
+    if headless and not HEADLESS:
+        HEADLESS = True
+        use_agg()
+    TEXT_ONLY = TEXT_ONLY or text_only
+
+
+# Command-line flags shared by the analysis scripts, applied to rendering and tracing
+def parse_script_args(description=None, argv=None):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--headless', action='store_true',
+                        help='save the chart instead of opening a window (same as OKC_HEADLESS=1)')
+    parser.add_argument('--text-only', action='store_true',
+                        help='print the results without drawing the chart (same as OKC_TEXT_ONLY=1)')
+    parser.add_argument('--trace', action='store_true', help='record stage timings (same as OKC_TRACE=1)')
+    parser.add_argument('--profile', action='store_true', help='also dump cProfile output per stage')
+    args = parser.parse_args(argv)
+    configure(headless=args.headless, text_only=args.text_only)
+    instrument.configure(trace=args.trace, profile=args.profile)
+    return args
+
+
+# Feed the chart data into `digest`: pandas objects by their hashed values plus labels,
+# containers item by item, anything else (numbers, strings) by its repr
+def update_digest(digest, data):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        labels = list(data.columns) if isinstance(data, pd.DataFrame) else data.name
+        digest.update(repr((type(data).__name__, labels, list(data.index.names))).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    elif isinstance(data, Mapping):
+        digest.update(f'mapping{len(data)}'.encode())
+        for key in sorted(data, key=repr):
+            update_digest(digest, key)
+            update_digest(digest, data[key])
+    elif isinstance(data, (list, tuple)):
+        digest.update(f'sequence{len(data)}'.encode())
+        for item in data:
+            update_digest(digest, item)
+    else:
+        digest.update(f'{type(data).__name__}:{data!r}|'.encode())
+
+
+def content_hash(name, data, formats):
+    digest = hashlib.sha256(f'{RENDER_VERSION}|{name}|{",".join(formats)}|'.encode())
+    update_digest(digest, data)
+    return digest.hexdigest()
+
+
+def chart_paths(name, formats, output_dir):
+    return [os.path.join(output_dir, f'{name}.{fmt}') for fmt in formats]
+
+
+def is_current(name, digest, formats, output_dir):
+    hash_path = os.path.join(output_dir, f'{name}.sha256')
+    if not all(os.path.exists(path) for path in chart_paths(name, formats, output_dir) + [hash_path]):
+        return False
+    with open(hash_path, encoding='utf-8') as f:
+        return f.read().strip() == digest
+
+
+def save_figure(fig, name, digest, formats=FORMATS, output_dir=OUTPUT_DIR):
+    import matplotlib.pyplot as plt
+
+    os.makedirs(output_dir, exist_ok=True)
+    hash_path = os.path.join(output_dir, f'{name}.sha256')
+    try:
+        os.remove(hash_path)
+    except FileNotFoundError:
+        pass
+    for fmt, path in zip(formats, chart_paths(name, formats, output_dir)):
+        replace_atomically(path, lambda tmp_path: fig.savefig(tmp_path, format=fmt, bbox_inches='tight'))
+    replace_atomically(hash_path, lambda tmp_path: write_hash(tmp_path, digest))
+    plt.close(fig)
+
+
+def write_hash(path, digest):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(digest)
+
+
+# Drop-in replacement for plt.show(): opens the window normally, writes the
+# figure to the charts folder in headless mode (unless `data` is unchanged)
+def show(fig, name, data=None, formats=FORMATS, output_dir=OUTPUT_DIR):
+    import matplotlib.pyplot as plt
+
+    if not HEADLESS:
+        plt.show()
+        return
+    with stage('render'):
+        digest = content_hash(name, data, formats)
+        if data is not None and is_current(name, digest, formats, output_dir):
+            print(f"Chart {name} is up to date.")
+            plt.close(fig)
+            return
+        save_figure(fig, name, digest, formats, output_dir)
+    print(f"Chart {name} saved to {output_dir}.")
+
+
+# Whether the script still has to draw its chart: not for a text-only run, nor for a
+# headless run whose saved chart came from the same data (checked before any plotting)
+def wants_chart(name, data=None, formats=FORMATS, output_dir=OUTPUT_DIR):
+    if TEXT_ONLY:
+        return False
+    if HEADLESS and data is not None and is_current(name, content_hash(name, data, formats), formats, output_dir):
+        print(f"Chart {name} is up to date.")
+        return False
+    return True
+
+
+# Chart builders for the batch run, one per kind of figure. Each takes the
+# already aggregated data, so the worker processes only plot.
+
+def plot_tier_points(avg_points):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for tier in avg_points.columns:
+        values = avg_points[tier].dropna()
+        ax.plot(values.index, values.values, label=tier)
+    ax.set_xlabel('Season')
+    ax.set_ylabel('Average Points per Game')
+    ax.set_title('Average Points per Game for All-Star and All NBA Teams (2007-2021)')
+    ax.legend(loc='upper left')
+    return fig
+
+
+def plot_experience(experience):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for tier in experience.columns:
+        values = experience[tier].dropna()
+        ax.plot(values.index, values.values, marker='o', label=tier)
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Average Years of Experience')
+    ax.set_title('Average Years of Experience to First Award Selection')
+    ax.legend()
+    return fig
+
+
+def plot_outcome_counts(counts, title):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.barplot(x=counts.index, y=counts.values, hue=counts.index, palette='viridis', legend=False, ax=ax)
+    for container in ax.containers:
+        ax.bar_label(container)
+    ax.set_title(title)
+    ax.set_xlabel('Career Outcome')
+    ax.set_ylabel('Number of Players')
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    return fig
+
+
+def plot_team_oreb(team_games, team):
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(team_games['game_number'], team_games['oreb_pct'], label=f'{team} Offensive Rebound %')
+    ax.plot(team_games['game_number'], team_games['season_to_date'], linestyle='--', label='Predicted (season to date)')
+    ax.set_title(f"{team} Offensive Rebound % by Game")
+    ax.set_xlabel("Number of Games")
+    ax.set_ylabel("Offensive Rebound % per Game")
+    ax.legend()
+    return fig
+
+
+PLOTTERS = {
+    'tier_points': plot_tier_points,
+    'experience': plot_experience,
+    'outcome_counts': plot_outcome_counts,
+    'team_oreb': plot_team_oreb,
+}
+
+
+# Worker: skip the chart when its data hash is unchanged, otherwise draw and save it
+def render_job(job):
+    name, kind, data, kwargs, formats, output_dir = job
+    digest = content_hash(name, (data, kwargs), formats)
+    if is_current(name, digest, formats, output_dir):
+        return name, 'skipped'
+    use_agg()
+    fig = PLOTTERS[kind](data, **kwargs)
+    save_figure(fig, name, digest, formats, output_dir)
+    return name, 'rendered'
+
+
+# Aggregate everything once in the parent process and describe one job per chart
+def build_jobs(formats=FORMATS, output_dir=OUTPUT_DIR):
+    import pandas as pd
+
+    from okc_analysis.draft_classes import load_draft_class_matrix
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.milestones import experience_by_first_season, first_milestone_seasons
+    from okc_analysis.outcomes import OUTCOME_ORDER
+    from okc_analysis.rebounding import ReboundForecaster
+    from okc_analysis.tiers import SCORING_TIERS, tier_per_game, tier_season_totals
+
+    player_stats, awards_data, rebounding_data = load_datasets('player_stats', 'awards_data', 'team_rebounding_data')
+    jobs = []
+
+    def add(name, kind, data, **kwargs):
+        jobs.append((name, kind, data, kwargs, tuple(formats), output_dir))
+
+    totals = tier_season_totals(player_stats, awards_data, stats=['points', 'games'], first_season=2007, last_season=2021)
+    add('tier_points', 'tier_points', tier_per_game(totals, stats=['points'], tiers=SCORING_TIERS)['points'])
+
+    milestones = first_milestone_seasons(player_stats, awards_data)
+    add('experience', 'experience', experience_by_first_season(milestones[milestones['draftyear'] >= 2007]))
+
+    # Every draft class from the cached draft year x outcome matrix
+    for draft_year, counts in load_draft_class_matrix()['counts'].iterrows():
+        counts = pd.Series(counts.to_numpy(), index=OUTCOME_ORDER, name='count')
+        add(f'outcomes_{draft_year}_draft', 'outcome_counts', counts,
+            title=f'{draft_year} NBA Draft Players Best Career Outcome from 2015-2021')
+
+    predictions = ReboundForecaster().process(rebounding_data)
+    for team, team_games in predictions.groupby('team'):
+        add(f'oreb_{team}', 'team_oreb', team_games[['game_number', 'oreb_pct', 'season_to_date']], team=team)
+    return jobs
+
+
+def render_all(jobs, workers=None):
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(render_job, jobs, chunksize=4))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render every chart to image files without a display')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS))
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores)')
+    args = parser.parse_args(argv)
+
+    results = render_all(build_jobs(args.formats, args.output_dir), workers=args.workers)
+    rendered = sum(status == 'rendered' for status in results.values())
+    print(f"{rendered} charts rendered, {len(results) - rendered} up to date, in {args.output_dir}")
+
+
+if __name__ == '__main__':
+    use_agg()
+    main()
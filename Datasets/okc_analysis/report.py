@@ -0,0 +1,109 @@
+# Objective:
+# Write the career outcome predictions as reports that are regenerated, not appended to
+#   - Each output is streamed row by row into a temporary file of its own
+#     and moved into place, so readers never see a half-written report and
+#     concurrent writers never share a temp file
+#   - Formats: HTML table, CSV and JSON lines, all with the probability of
+#     every career outcome
+#   - A hash of the prediction frame is stored next to the reports; when the
+#     predictions haven't changed nothing is rewritten. It is removed before
+#     the reports are rewritten and written last, so an interrupted run never
+#     leaves a hash vouching for reports it didn't finish
+
+import csv
+import hashlib
+import html
+import json
+import os
+
+import pandas as pd
+
+from okc_analysis.loader import replace_atomically
+
+FORMATS = ('html', 'csv', 'jsonl')
+
+# Bump to rewrite every report after changing the layout
+REPORT_VERSION = 1
+
+
+def predictions_hash(predictions, formats):
+    digest = hashlib.sha256(f'{REPORT_VERSION}|{",".join(formats)}|{",".join(map(str, predictions.columns))}'.encode())
+    digest.update(pd.util.hash_pandas_object(predictions, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Probabilities are kept to 6 decimals in the machine-readable formats
+def plain_value(column, value, probability_columns):
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    return round(value, 6) if column in probability_columns else value
+
+
+def write_html(predictions, f, probability_columns):
+    columns = list(predictions.columns)
+    f.write('<table border="1" class="dataframe predictions">\n  <thead>\n    <tr style="text-align: right;">\n')
+    for column in columns:
+        f.write(f'      <th>{html.escape(str(column))}</th>\n')
+    f.write('    </tr>\n  </thead>\n  <tbody>\n')
+    for row in predictions.itertuples(index=False, name=None):
+        f.write('    <tr>\n')
+        for column, value in zip(columns, row):
+            text = f'{value:.2%}' if column in probability_columns else ('' if pd.isna(value) else value)
+            f.write(f'      <td>{html.escape(str(text))}</td>\n')
+        f.write('    </tr>\n')
+    f.write('  </tbody>\n</table>\n')
+
+
+def write_csv(predictions, f, probability_columns):
+    writer = csv.writer(f, lineterminator='\n')
+    writer.writerow(predictions.columns)
+    for row in predictions.itertuples(index=False, name=None):
+        values = (plain_value(column, value, probability_columns) for column, value in zip(predictions.columns, row))
+        writer.writerow(['' if value is None else value for value in values])
+
+
+def write_jsonl(predictions, f, probability_columns):
+    columns = [str(column) for column in predictions.columns]
+    for row in predictions.itertuples(index=False, name=None):
+        record = {column: plain_value(column, value, probability_columns) for column, value in zip(columns, row)}
+        f.write(json.dumps(record) + '\n')
+
+
+WRITERS = {'html': write_html, 'csv': write_csv, 'jsonl': write_jsonl}
+
+
+def write_report(path, fmt, predictions, probability_columns):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        WRITERS[fmt](predictions, f, probability_columns)
+
+
+def write_hash(path, digest):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(digest)
+
+
+# Write `predictions` to <path_base>.<format> for every format, skipping the
+# work entirely when the same predictions were already written.
+# Returns True when the reports were (re)written.
+def write_predictions(predictions, path_base, formats=FORMATS, probability_columns=()):
+    formats = tuple(formats)
+    digest = predictions_hash(predictions, formats)
+    hash_path = path_base + '.sha256'
+    paths = {fmt: f'{path_base}.{fmt}' for fmt in formats}
+
+    if os.path.exists(hash_path) and all(os.path.exists(path) for path in paths.values()):
+        with open(hash_path, encoding='utf-8') as f:
+            if f.read().strip() == digest:
+                return False
+
+    os.makedirs(os.path.dirname(os.path.abspath(path_base)), exist_ok=True)
+    try:
+        os.remove(hash_path)
+    except FileNotFoundError:
+        pass
+    for fmt, path in paths.items():
+        replace_atomically(path, lambda tmp_path: write_report(tmp_path, fmt, predictions, set(probability_columns)))
+    replace_atomically(hash_path, lambda tmp_path: write_hash(tmp_path, digest))
+    return True
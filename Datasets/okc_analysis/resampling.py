@@ -0,0 +1,237 @@
+# Objective:
+# Bootstrap and jackknife confidence intervals for per-season aggregates
+#   - The estimate of each group (e.g. season x tier) is a ratio of sums,
+#     sum(value) / sum(weight): points / games for points per game, or a
+#     plain mean of years of experience when there is no weight
+#   - Players are resampled within each group, not stat rows, so a traded
+#     player's team rows move together (pass one row per player and group)
+#   - Every resample of every group is drawn as one index matrix
+#     (resamples x players, each column drawing from its own group) and
+#     reduced with np.add.reduceat, in blocks to bound memory; blocks can
+#     run over a process pool with independent seeds, and the result is
+#     the same for any number of workers
+#   - The overall aggregate (mean of the group estimates per tier) resamples
+#     players across the pooled tier instead, so a season can get more,
+#     fewer or none of them; a tier with one player per season still varies
+#   - The jackknife (leave one player out) is exact and needs no resamples,
+#     with a normal interval from its standard error; for the overall
+#     aggregate the left-out player comes from the pooled tier as well
+#   - A group (or tier) with a single player has no spread to resample, and
+#     gets no interval rather than a zero-width one
+#
+# Run `python -m okc_analysis.resampling` from the Datasets folder for the
+# Part1 intervals and their timings.
+
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+BLOCK_SIZE = 1000
+
+
+# Rows sorted into contiguous groups: values, weights, group of each row,
+# first row and size of each group, and the group index
+def grouped_units(frame, groups, value, weight=None):
+    frame = frame.reset_index()
+    codes = frame.groupby(groups, sort=True).ngroup().to_numpy()
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    sizes = np.bincount(codes)
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    values = frame[value].to_numpy(float)[order]
+    weights = np.ones(len(frame)) if weight is None else frame[weight].to_numpy(float)[order]
+    index = frame.groupby(groups, sort=True).size().index
+    return {'values': values, 'weights': weights, 'codes': codes, 'starts': starts, 'sizes': sizes, 'index': index}
+
+
+# Average of the group estimates within each overall group (e.g. tier), ignoring missing ones.
+# `estimates` has the groups on its last axis.
+def overall_means(estimates, membership):
+    known = np.isfinite(estimates)
+    return (np.where(known, estimates, 0) @ membership) / (known @ membership)
+
+
+def overall_membership(index, overall):
+    labels = index.get_level_values(overall) if isinstance(index, pd.MultiIndex) else index
+    codes, uniques = pd.factorize(labels, sort=True)
+    return np.eye(len(uniques))[codes], pd.Index(uniques, name=overall)
+
+
+# Overall group of every row, and the rows of each overall group (pool_order[pool_starts[g]:][:pool_sizes[g]])
+def overall_pools(codes, membership):
+    row_pool = membership.argmax(axis=1)[codes]
+    pool_sizes = np.bincount(row_pool, minlength=membership.shape[1])
+    return {
+        'row_pool': row_pool,
+        'pool_order': np.argsort(row_pool, kind='stable'),
+        'pool_starts': np.concatenate([[0], np.cumsum(pool_sizes)[:-1]]),
+        'pool_sizes': pool_sizes,
+    }
+
+
+# ------------------------------- Bootstrap --------------------------------
+
+_shared = {}
+
+
+def init_worker(units):
+    _shared.update(units)
+
+
+# Group estimates of `count` resamples: one draw per (resample, player) within the player's group
+def bootstrap_block(task):
+    seed, count = task
+    codes, starts, sizes = _shared['codes'], _shared['starts'], _shared['sizes']
+    rng = np.random.default_rng(seed)
+    draws = starts[codes] + rng.integers(0, sizes[codes], size=(count, len(codes)))
+    sums = np.add.reduceat(_shared['values'][draws], starts, axis=1)
+    totals = np.add.reduceat(_shared['weights'][draws], starts, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / totals
+
+
+# Group estimates of `count` resamples that draw every player from their whole overall group
+# (e.g. every season of their tier); a group no player was drawn into comes out missing
+def pooled_block(task):
+    seed, count = task
+    row_pool, pool_starts, pool_sizes = _shared['row_pool'], _shared['pool_starts'], _shared['pool_sizes']
+    groups = len(_shared['starts'])
+    rng = np.random.default_rng(seed)
+    draws = _shared['pool_order'][pool_starts[row_pool] + rng.integers(0, pool_sizes[row_pool],
+                                                                       size=(count, len(row_pool)))]
+    slots = (np.arange(count)[:, None] * groups + _shared['codes'][draws]).ravel()
+    sums = np.bincount(slots, weights=_shared['values'][draws].ravel(), minlength=count * groups)
+    totals = np.bincount(slots, weights=_shared['weights'][draws].ravel(), minlength=count * groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (sums / totals).reshape(count, groups)
+
+
+def bootstrap_estimates(units, resamples=10000, seed=0, workers=1, block_size=BLOCK_SIZE, block=bootstrap_block):
+    counts = [min(block_size, resamples - start) for start in range(0, resamples, block_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(counts))
+    tasks = list(zip(seeds, counts))
+    if workers == 1:
+        init_worker(units)
+        return np.concatenate([block(task) for task in tasks])
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(units,)) as pool:
+        return np.concatenate(list(pool.map(block, tasks)))
+
+
+def interval_table(estimates, resampled, index, players, confidence):
+    tail = (1 - confidence) / 2 * 100
+    with np.errstate(invalid='ignore'):
+        lower, upper = np.nanpercentile(resampled, [tail, 100 - tail], axis=0)
+    std_errors = np.nanstd(resampled, axis=0)
+    single = np.asarray(players) < 2
+    lower, upper, std_errors = (np.where(single, np.nan, values) for values in (lower, upper, std_errors))
+    return pd.DataFrame({'estimate': estimates, 'lower': lower, 'upper': upper,
+                         'std_error': std_errors, 'players': players}, index=index)
+
+
+# Percentile bootstrap intervals of sum(value) / sum(weight) per group, and (with `overall`,
+# an index level of `groups`) of the mean group estimate per overall group.
+# Returns (per-group table, overall table or None).
+def bootstrap_ci(frame, groups, value, weight=None, overall=None, resamples=10000, confidence=0.95, seed=0,
+                 workers=1):
+    units = grouped_units(frame, groups, value, weight)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimates = (np.add.reduceat(units['values'], units['starts'])
+                     / np.add.reduceat(units['weights'], units['starts']))
+    arrays = {name: array for name, array in units.items() if name != 'index'}
+    resampled = bootstrap_estimates(arrays, resamples, seed, workers)
+    table = interval_table(estimates, resampled, units['index'], units['sizes'], confidence)
+    if overall is None:
+        return table, None
+
+    # A separate seed stream, so adding `overall` doesn't change the per-group intervals
+    membership, overall_index = overall_membership(units['index'], overall)
+    pooled = bootstrap_estimates({**arrays, **overall_pools(units['codes'], membership)}, resamples, [seed, 1],
+                                 workers, block=pooled_block)
+    overall_table = interval_table(overall_means(estimates, membership), overall_means(pooled, membership),
+                                   overall_index, (units['sizes'] @ membership).astype(int), confidence)
+    return table, overall_table
+
+
+# ------------------------------- Jackknife --------------------------------
+
+# Leave-one-player-out intervals of the same estimates, estimate +/- z * jackknife standard error.
+# Groups with a single player get no interval.
+def jackknife_ci(frame, groups, value, weight=None, overall=None, confidence=0.95):
+    units = grouped_units(frame, groups, value, weight)
+    codes, sizes = units['codes'], units['sizes']
+    sums = np.bincount(codes, weights=units['values'])
+    totals = np.bincount(codes, weights=units['weights'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        estimates = sums / totals
+        left_out = (sums[codes] - units['values']) / (totals[codes] - units['weights'])
+        left_out_mean = np.bincount(codes, weights=left_out) / sizes
+        spread = np.bincount(codes, weights=(left_out - left_out_mean[codes]) ** 2)
+        std_errors = np.where(sizes > 1, np.sqrt((sizes - 1) / sizes * spread), np.nan)
+
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    table = pd.DataFrame({'estimate': estimates, 'lower': estimates - z * std_errors,
+                          'upper': estimates + z * std_errors, 'std_error': std_errors, 'players': sizes},
+                         index=units['index'])
+    if overall is None:
+        return table, None
+
+    # Leave each player of the pooled tier out in turn: their group's estimate becomes the left-out one,
+    # or drops out of the mean when they were its only player
+    membership, overall_index = overall_membership(units['index'], overall)
+    row_pool = overall_pools(codes, membership)['row_pool']
+    known = np.isfinite(estimates)
+    overall_estimates = overall_means(estimates, membership)
+    known_sums, known_counts = np.where(known, estimates, 0) @ membership, known @ membership
+    left_known = np.isfinite(left_out)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        pooled_left_out = ((known_sums[row_pool] - np.where(known[codes], estimates[codes], 0)
+                            + np.where(left_known, left_out, 0))
+                           / (known_counts[row_pool] - known[codes] + left_known))
+    players = np.bincount(row_pool, minlength=membership.shape[1])
+    pooled_mean = np.bincount(row_pool, weights=pooled_left_out, minlength=len(players)) / players
+    pooled_spread = np.bincount(row_pool, weights=(pooled_left_out - pooled_mean[row_pool]) ** 2,
+                                minlength=len(players))
+    with np.errstate(invalid='ignore'):
+        overall_errors = np.where(players > 1, np.sqrt((players - 1) / players * pooled_spread), np.nan)
+    overall_table = pd.DataFrame({'estimate': overall_estimates, 'lower': overall_estimates - z * overall_errors,
+                                  'upper': overall_estimates + z * overall_errors, 'std_error': overall_errors,
+                                  'players': (sizes @ membership).astype(int)}, index=overall_index)
+    return table, overall_table
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.milestones import first_milestone_seasons, first_milestone_years
+    from okc_analysis.tiers import tier_player_seasons
+
+    parser = argparse.ArgumentParser(description='Bootstrap / jackknife intervals for the Part1 aggregates')
+    parser.add_argument('--resamples', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=1, help='process pool size (1 runs in this process)')
+    args = parser.parse_args()
+
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data')
+    tier_players = tier_player_seasons(player_stats, awards_data, first_season=2007, last_season=2021)
+    milestones = first_milestone_seasons(player_stats, awards_data)
+    years = first_milestone_years(milestones[milestones['draftyear'] >= 2007])
+
+    with pd.option_context('display.width', 200, 'display.float_format', '{:.2f}'.format):
+        for label, frame, groups, value, weight in [
+                ('Points per game by tier (Part1_Question1)', tier_players, ['season', 'tier'], 'points', 'games'),
+                ('Years to first selection (Part1_Question2)', years, ['first_season', 'tier'],
+                 'years_of_experience', None)]:
+            start = time.perf_counter()
+            per_group, overall = bootstrap_ci(frame, groups, value, weight, overall='tier',
+                                              resamples=args.resamples, workers=args.workers)
+            elapsed = time.perf_counter() - start
+            print(f"------- {label}: {args.resamples} resamples of {len(per_group)} groups "
+                  f"({len(frame)} players) in {elapsed:.2f}s -------\n")
+            print("Bootstrap, mean over seasons:")
+            print(overall.to_string())
+            print("\nJackknife, mean over seasons:")
+            print(jackknife_ci(frame, groups, value, weight, overall='tier')[1].to_string())
+            print()
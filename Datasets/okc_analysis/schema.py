@@ -0,0 +1,146 @@
+# Objective:
+# Declared schema for player_stats.csv and awards_data.csv
+#   - Integer counting stats are downcast to the smallest integer type
+#   - team / player are stored as categoricals
+#   - Award flags (0/1 or TRUE/FALSE) become real booleans
+#   - Nullable ranks and counts become small nullable integers
+#   - Any column that is missing, unexpected, or has values that don't fit
+#     its declared type raises a SchemaError instead of loading silently
+#
+# Run `python -m okc_analysis.schema` from the Datasets folder for a
+# memory report comparing the plain CSV load against the typed frames.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+# Column name -> declared type
+#   'flag'      boolean award flag, missing means not selected
+#   'category'  repeated strings
+#   'Int8' etc  nullable integers
+#   'int16' etc non-nullable integers
+#   'float32'   rate stats / percentages
+COUNTING_STATS = ['games', 'games_start', 'mins', 'fgm', 'fga', 'fgm3', 'fga3', 'fgm2', 'fga2', 'ftm', 'fta',
+                  'off_reb', 'def_reb', 'tot_reb', 'ast', 'steals', 'blocks', 'tov', 'tot_fouls', 'points']
+RATE_STATS = ['fgp', 'fgp3', 'fgp2', 'efg', 'ftp', 'PER', 'FTr', 'off_reb_pct', 'def_reb_pct', 'tot_reb_pct',
+              'ast_pct', 'stl_pct', 'blk_pct', 'tov_pct', 'usg', 'OWS', 'DWS', 'WS', 'OBPM', 'DBPM', 'BPM', 'VORP']
+
+PLAYER_STATS_SCHEMA = {
+    'nbapersonid': 'int32',
+    'player': 'category',
+    'draftyear': 'int16',
+    'draftpick': 'Int8',
+    'season': 'int16',
+    'nbateamid': 'int32',
+    'team': 'category',
+    **{column: 'int16' for column in COUNTING_STATS},
+    **{column: 'float32' for column in RATE_STATS},
+}
+
+AWARD_FLAGS = ['All NBA Defensive First Team', 'All NBA Defensive Second Team', 'All NBA First Team',
+               'All NBA Second Team', 'All NBA Third Team', 'All Rookie First Team', 'All Rookie Second Team',
+               'Bill Russell NBA Finals MVP', 'all_star_game', 'rookie_all_star_game']
+AWARD_COUNTS = ['Player Of The Month', 'Player Of The Week', 'Rookie Of The Month']
+AWARD_RANKS = ['allstar_rk', 'Defensive Player Of The Year_rk', 'Most Improved Player_rk',
+               'Most Valuable Player_rk', 'Rookie Of The Year_rk', 'Sixth Man Of The Year_rk',
+               'all_nba_points_rk', 'all_rookie_points_rk']
+
+# nbapersonid is nullable here: a few all-star voting rows have no player id
+AWARDS_DATA_SCHEMA = {
+    'season': 'int16',
+    'nbapersonid': 'Int32',
+    **{column: 'flag' for column in AWARD_FLAGS},
+    **{column: 'Int8' for column in AWARD_COUNTS},
+    **{column: 'Int16' for column in AWARD_RANKS},
+}
+
+SCHEMAS = {
+    'player_stats': PLAYER_STATS_SCHEMA,
+    'awards_data': AWARDS_DATA_SCHEMA,
+}
+
+FLAG_VALUES = {0: False, 1: True, False: False, True: True, 'FALSE': False, 'TRUE': True}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def to_flag(name, values):
+    present = values.dropna()
+    unknown = ~present.isin(list(FLAG_VALUES))
+    if unknown.any():
+        raise SchemaError(f"{name}: unexpected flag values {sorted(map(str, present[unknown].unique()))}")
+    return values.map(FLAG_VALUES).eq(True)
+
+
+def to_integer(name, values, dtype):
+    nullable = dtype[0].isupper()
+    try:
+        numbers = pd.to_numeric(values, errors='raise')
+    except (TypeError, ValueError) as error:
+        raise SchemaError(f"{name}: {error}") from error
+    present = numbers.dropna()
+
+    if not nullable and len(present) != len(numbers):
+        raise SchemaError(f"{name}: {len(numbers) - len(present)} missing values in a non-nullable {dtype} column")
+    if (present != np.round(present)).any():
+        raise SchemaError(f"{name}: non-integer values in a {dtype} column")
+
+    limits = np.iinfo(dtype.lower())
+    if len(present) and (present.min() < limits.min or present.max() > limits.max):
+        raise SchemaError(f"{name}: values {present.min()}..{present.max()} don't fit in {dtype}")
+    return numbers.astype(dtype)
+
+
+def to_float(name, values, dtype):
+    try:
+        return pd.to_numeric(values, errors='raise').astype(dtype)
+    except (TypeError, ValueError) as error:
+        raise SchemaError(f"{name}: {error}") from error
+
+
+# Check a freshly parsed frame against its declared schema and convert every column
+def apply_schema(frame, schema):
+    missing = [column for column in schema if column not in frame.columns]
+    unexpected = [column for column in frame.columns if column not in schema]
+    if missing or unexpected:
+        raise SchemaError(f"missing columns {missing}, unexpected columns {unexpected}")
+
+    columns = {}
+    for column, dtype in schema.items():
+        values = frame[column]
+        if dtype == 'flag':
+            columns[column] = to_flag(column, values)
+        elif dtype == 'category':
+            columns[column] = values.astype('category')
+        elif dtype.startswith('float'):
+            columns[column] = to_float(column, values, dtype)
+        else:
+            columns[column] = to_integer(column, values, dtype)
+    return pd.DataFrame(columns, index=frame.index)
+
+
+# Deep memory usage of the plain CSV load against the typed frame for each dataset
+def memory_report(data_dir=None):
+    from okc_analysis.loader import DATA_DIR, DATASETS
+
+    data_dir = data_dir or DATA_DIR
+    rows = []
+    for name, schema in SCHEMAS.items():
+        raw = pd.read_csv(os.path.join(data_dir, DATASETS[name]))
+        typed = apply_schema(raw, schema)
+        raw_bytes = raw.memory_usage(deep=True).sum()
+        typed_bytes = typed.memory_usage(deep=True).sum()
+        rows.append({'dataset': name, 'rows': len(raw), 'csv_bytes': raw_bytes,
+                     'typed_bytes': typed_bytes, 'reduction': raw_bytes / typed_bytes})
+    return pd.DataFrame(rows).set_index('dataset')
+
+
+if __name__ == '__main__':
+    report = memory_report()
+    print("------- Memory Report -------\n")
+    for name, row in report.iterrows():
+        print(f"{name}: {row['csv_bytes'] / 1e6:.2f} MB -> {row['typed_bytes'] / 1e6:.2f} MB "
+              f"({row['reduction']:.1f}x smaller, {int(row['rows'])} rows)")
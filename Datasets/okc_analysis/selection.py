@@ -0,0 +1,154 @@
+# Objective:
+# Cross-validated model selection for the career outcome classifier
+#   - Stratified k-fold grouped by player, so a player's seasons never sit
+#     on both sides of a split
+#   - A grid of regularized logistic regressions, histogram gradient
+#     boosting and random forests, over the per-player feature vectors
+#   - Every (candidate, fold) fit runs in a process pool on all cores
+#   - Reports log-loss, accuracy, fit time and prediction latency per candidate
+#   - --without-team-context drops each player's early team ratings / win
+#     percentage (team_context.py) from the features, to see whether they
+#     earn their place
+#
+# From the Datasets folder:
+#   python -m okc_analysis.selection --folds 5
+#   python -m okc_analysis.selection --folds 5 --without-team-context
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.model_selection import StratifiedGroupKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from threadpoolctl import threadpool_limits
+
+from okc_analysis.features import FEATURE_COLUMNS
+from okc_analysis.model import TARGET
+
+SELECTION_FEATURES = FEATURE_COLUMNS
+
+
+def candidate_grid():
+    candidates = {}
+    for C in (0.01, 0.1, 1.0, 10.0):
+        candidates[f'logistic C={C}'] = LogisticRegression(C=C, max_iter=2000, random_state=42)
+    for learning_rate in (0.05, 0.1):
+        for max_leaf_nodes in (15, 31):
+            candidates[f'hist_gb lr={learning_rate} leaves={max_leaf_nodes}'] = HistGradientBoostingClassifier(
+                learning_rate=learning_rate, max_leaf_nodes=max_leaf_nodes, random_state=42)
+    for max_depth in (None, 12):
+        for min_samples_leaf in (1, 5):
+            candidates[f'random_forest depth={max_depth} leaf={min_samples_leaf}'] = RandomForestClassifier(
+                n_estimators=200, max_depth=max_depth, min_samples_leaf=min_samples_leaf, n_jobs=1, random_state=42)
+    return candidates
+
+
+def make_pipeline(estimator):
+    return Pipeline([
+        ('imputer', SimpleImputer(strategy='mean')),
+        ('scaler', StandardScaler()),
+        ('model', estimator),
+    ])
+
+
+# The feature matrix and labels are sent to each worker once, not with every task
+_shared = {}
+
+
+def init_worker(X, y, classes):
+    _shared.update(X=X, y=y, classes=classes)
+    # The pool already uses every core, so keep each worker's BLAS/OpenMP to one thread
+    threadpool_limits(1)
+
+
+def evaluate_fold(task):
+    name, estimator, train_index, test_index = task
+    X, y, classes = _shared['X'], _shared['y'], _shared['classes']
+    pipeline = make_pipeline(clone(estimator))
+
+    start = time.perf_counter()
+    pipeline.fit(X[train_index], y[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    probabilities = pipeline.predict_proba(X[test_index])
+    predict_seconds = time.perf_counter() - start
+
+    # A fold can miss a rare class entirely, so line the columns up with every class
+    aligned = np.zeros((len(test_index), len(classes)))
+    aligned[:, np.searchsorted(classes, pipeline.classes_)] = probabilities
+    y_test = y[test_index]
+    return {
+        'candidate': name,
+        'log_loss': log_loss(y_test, aligned, labels=classes),
+        'accuracy': accuracy_score(y_test, classes[aligned.argmax(axis=1)]),
+        'fit_seconds': fit_seconds,
+        'predict_us_per_row': predict_seconds / len(test_index) * 1e6,
+    }
+
+
+# Score every candidate on the same grouped, stratified folds.
+# Returns one row per candidate, best log-loss first.
+def select_model(train_data, candidates=None, features=SELECTION_FEATURES, folds=5, workers=None):
+    candidates = candidates or candidate_grid()
+    X = train_data[features].to_numpy(dtype=float)
+    y = train_data[TARGET].to_numpy()
+    classes = np.unique(y)
+    splitter = StratifiedGroupKFold(n_splits=folds, shuffle=True, random_state=42)
+    splits = list(splitter.split(X, y, groups=train_data['nbapersonid']))
+
+    tasks = [(name, estimator, train_index, test_index)
+             for name, estimator in candidates.items()
+             for train_index, test_index in splits]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(X, y, classes)) as pool:
+        results = pd.DataFrame(pool.map(evaluate_fold, tasks))
+
+    summary = results.groupby('candidate').agg(
+        log_loss=('log_loss', 'mean'),
+        log_loss_std=('log_loss', 'std'),
+        accuracy=('accuracy', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        predict_us_per_row=('predict_us_per_row', 'mean'),
+    )
+    return summary.sort_values('log_loss')
+
+
+def main(argv=None):
+    from okc_analysis.features import load_player_features
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.model import training_data
+    from okc_analysis.normalization import load_season_lengths
+    from okc_analysis.team_context import TEAM_FEATURE_COLUMNS
+
+    parser = argparse.ArgumentParser(description='Cross-validated model selection for career outcomes')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help='process pool size (default: all cores)')
+    parser.add_argument('--without-team-context', action='store_true', help='drop the early team context features')
+    args = parser.parse_args(argv)
+
+    player_stats, awards_data = load_datasets('player_stats', 'awards_data')
+    train_data = training_data(player_stats, awards_data, load_player_features(), season_lengths=load_season_lengths())
+    features = SELECTION_FEATURES
+    if args.without_team_context:
+        features = [column for column in SELECTION_FEATURES if column not in TEAM_FEATURE_COLUMNS]
+
+    start = time.perf_counter()
+    summary = select_model(train_data, features=features, folds=args.folds, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated {len(summary)} candidates x {args.folds} folds on {os.cpu_count()} cores in {elapsed:.1f}s\n")
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.4f}'.format):
+        print(summary)
+
+
+if __name__ == '__main__':
+    main()
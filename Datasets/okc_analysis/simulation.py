@@ -0,0 +1,182 @@
+# Objective:
+# Monte Carlo simulation of the rest of the season's offensive rebounding
+#   - Each team's offensive rebound rate gets a beta posterior: a league
+#     prior (empirical Bayes, its strength fitted from how much the team
+#     rates spread beyond binomial noise) updated with the games played
+#   - Every simulated season draws one rate per team from its posterior,
+#     then each remaining game's offensive rebound chances (resampled from
+#     the team's played games) and its offensive rebounds as a binomial
+#     draw over those chances. The games of one simulated season share the
+#     rate, so their rebounds are drawn as one binomial over the summed
+#     chances (the same distribution, with one draw instead of one per game)
+#   - All teams and remaining games are one (simulations x teams x games)
+#     array per block; blocks run in this process or over a process pool
+#     with spawned seeds, and the result is the same for any worker count
+#   - Only the season totals are kept, written block by block into
+#     (simulations x teams) arrays, so a million simulated seasons fits in
+#     a few hundred MB
+#
+# From the Datasets folder:
+#   python -m okc_analysis.simulation --simulations 1000000 --through-game 80 --team OKC
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from okc_analysis.backtest import rebounding_matrices
+
+# Elements of the (simulations x teams x games) draw held in memory at once
+BLOCK_ELEMENTS = 4_000_000
+
+
+# Beta prior pseudo-counts from the played games: the league rate, with a strength
+# (in offensive rebound chances) matching the spread of the team rates beyond binomial noise
+def league_prior(rebounds, chances, prior_strength=None):
+    team_rebounds, team_chances = rebounds.sum(axis=1), chances.sum(axis=1)
+    league_rate = team_rebounds.sum() / team_chances.sum()
+    if prior_strength is None:
+        noise = np.mean(league_rate * (1 - league_rate) / team_chances)
+        spread = np.var(team_rebounds / team_chances, ddof=1) - noise
+        # No spread beyond noise means every team shares the league rate
+        prior_strength = league_rate * (1 - league_rate) / spread - 1 if spread > 0 else team_chances.sum()
+    return league_rate * prior_strength, (1 - league_rate) * prior_strength
+
+
+# Posterior (alpha, beta) of every team's rate after the played games
+def posterior(rebounds, chances, prior_strength=None):
+    prior_alpha, prior_beta = league_prior(rebounds, chances, prior_strength)
+    return prior_alpha + rebounds.sum(axis=1), prior_beta + (chances - rebounds).sum(axis=1)
+
+
+# ------------------------------- Simulation -------------------------------
+
+_shared = {}
+
+
+def init_worker(state):
+    _shared.update(state)
+
+
+# Remaining-games totals of `count` simulated seasons -> (rebounds, chances), each (count x teams)
+def simulate_block(task):
+    seed, count = task
+    alpha, beta, played_chances = _shared['alpha'], _shared['beta'], _shared['played_chances']
+    teams, played = played_chances.shape
+    rng = np.random.default_rng(seed)
+
+    rates = rng.beta(alpha, beta, size=(count, teams))
+    games = rng.integers(0, played, size=(count, teams, _shared['remaining']))
+    chances = played_chances[np.arange(teams)[None, :, None], games].sum(axis=2)
+    return rng.binomial(chances, rates).astype(np.int32), chances.astype(np.int32)
+
+
+# Every team must have played the first `through_game` games. With uneven
+# mid-season data the pivot leaves NaN gaps, which would otherwise be cast
+# to garbage chance counts.
+def check_played(teams, rebounds, chances, through_game):
+    if not 1 <= through_game <= rebounds.shape[1]:
+        raise ValueError(f"through_game must be within 1-{rebounds.shape[1]}, got {through_game}")
+    unplayed = np.isnan(rebounds[:, :through_game]).any(axis=1) | np.isnan(chances[:, :through_game]).any(axis=1)
+    if unplayed.any():
+        raise ValueError(f"{', '.join(map(str, teams[unplayed]))} haven't played {through_game} games yet")
+
+
+# Simulate games through_game+1 .. the last game for every team.
+# Returns the teams, their posterior, and the simulated final oreb_pct and
+# remaining-games offensive rebounds (simulations x teams).
+def simulate_season(rebounding_data, through_game=80, simulations=100000, seed=0, workers=1, prior_strength=None,
+                    block_size=None):
+    teams, rebounds, chances = rebounding_matrices(rebounding_data)
+    check_played(teams, rebounds, chances, through_game)
+    played_rebounds, played_chances = rebounds[:, :through_game], chances[:, :through_game].astype(np.int64)
+    remaining = rebounds.shape[1] - through_game
+    alpha, beta = posterior(played_rebounds, played_chances, prior_strength)
+
+    block_size = block_size or max(1, BLOCK_ELEMENTS // (len(teams) * max(remaining, 1)))
+    starts = range(0, simulations, block_size)
+    counts = [min(block_size, simulations - start) for start in starts]
+    tasks = list(zip(np.random.SeedSequence(seed).spawn(len(counts)), counts))
+    state = {'alpha': alpha, 'beta': beta, 'played_chances': played_chances, 'remaining': remaining}
+
+    remaining_rebounds = np.empty((simulations, len(teams)), dtype=np.int32)
+    remaining_chances = np.empty((simulations, len(teams)), dtype=np.int32)
+
+    def store(blocks):
+        for start, count, (block_rebounds, block_chances) in zip(starts, counts, blocks):
+            remaining_rebounds[start:start + count] = block_rebounds
+            remaining_chances[start:start + count] = block_chances
+
+    if workers == 1:
+        init_worker(state)
+        store(map(simulate_block, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(state,)) as pool:
+            store(pool.map(simulate_block, tasks))
+
+    final_oreb_pct = np.add(remaining_rebounds, played_rebounds.sum(axis=1), dtype=np.float32)
+    final_oreb_pct /= np.add(remaining_chances, played_chances.sum(axis=1), dtype=np.float32)
+    return {
+        'teams': teams,
+        'through_game': through_game,
+        'remaining_games': remaining,
+        'posterior_rate': alpha / (alpha + beta),
+        'season_to_date': played_rebounds.sum(axis=1) / played_chances.sum(axis=1),
+        'final_oreb_pct': final_oreb_pct,
+        'remaining_rebounds': remaining_rebounds,
+    }
+
+
+# One row per team: posterior rate, the spread of the final oreb_pct and of the
+# remaining-games total, and the chance of finishing above `threshold` (default: the average team rate)
+def season_summary(simulated, threshold=None, interval=0.9):
+    final, remaining = simulated['final_oreb_pct'], simulated['remaining_rebounds']
+    threshold = np.mean(simulated['season_to_date']) if threshold is None else threshold
+    tail = (1 - interval) / 2
+    final_low, final_high = np.quantile(final, [tail, 1 - tail], axis=0)
+    remaining_low, remaining_high = np.quantile(remaining, [tail, 1 - tail], axis=0)
+    return pd.DataFrame({
+        'season_to_date': simulated['season_to_date'],
+        'posterior_rate': simulated['posterior_rate'],
+        'final_mean': final.mean(axis=0, dtype=np.float64),  # a float32 running sum drifts over 1M rows
+        'final_low': final_low,
+        'final_high': final_high,
+        'p_above_threshold': (final > threshold).mean(axis=0),
+        'remaining_mean': remaining.mean(axis=0),
+        'remaining_low': remaining_low,
+        'remaining_high': remaining_high,
+    }, index=pd.Index(simulated['teams'], name='team'))
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    from okc_analysis.loader import load_dataset
+
+    parser = argparse.ArgumentParser(description='Monte Carlo simulation of the remaining offensive rebounding')
+    parser.add_argument('--simulations', type=int, default=100000)
+    parser.add_argument('--through-game', type=int, default=80, help='games already played')
+    parser.add_argument('--threshold', type=float, default=None, help='oreb_pct to beat (default: league average)')
+    parser.add_argument('--team', default='OKC')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1, help='process pool size (1 runs in this process)')
+    args = parser.parse_args()
+
+    rebounding_data = load_dataset('team_rebounding_data')
+    start = time.perf_counter()
+    try:
+        simulated = simulate_season(rebounding_data, args.through_game, args.simulations, args.seed, args.workers)
+    except ValueError as error:
+        parser.error(str(error))
+    elapsed = time.perf_counter() - start
+    summary = season_summary(simulated, args.threshold)
+
+    print(f"Simulated {args.simulations} seasons x {len(simulated['teams'])} teams x "
+          f"{simulated['remaining_games']} remaining games in {elapsed:.2f}s\n")
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.float_format', '{:.3f}'.format):
+        print(summary.sort_values('final_mean', ascending=False).to_string())
+    team = summary.loc[args.team]
+    print(f"\n{args.team}: final oreb_pct {team['final_mean']:.1%} (90% {team['final_low']:.1%}-{team['final_high']:.1%}), "
+          f"P(above threshold) {team['p_above_threshold']:.1%}, remaining offensive rebounds "
+          f"{team['remaining_mean']:.1f} (90% {team['remaining_low']:.0f}-{team['remaining_high']:.0f})")
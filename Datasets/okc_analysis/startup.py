@@ -0,0 +1,119 @@
+# Objective:
+# Startup benchmark: import time and time to first result
+#   - Imports: each module is imported in a fresh interpreter and timed on
+#     its own, together with the heavy libraries (matplotlib, seaborn,
+#     scikit-learn) that came with it
+#   - Commands: each script / CLI query runs in a fresh process and is
+#     timed until its first line of output and until it exits. The scripts
+#     run with --text-only (no chart, no plotting imports) next to a
+#     headless run that draws and saves the chart
+#   - Best / median of N runs; every run saves its chart to a fresh
+#     temporary folder, so the headless run always draws it
+#
+# Run from the Datasets folder, e.g.
+#   python -m okc_analysis.startup --repeat 5 --output /tmp/startup.json
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from okc_analysis.loader import DATA_DIR
+
+HEAVY_LIBRARIES = ['matplotlib', 'seaborn', 'sklearn']
+
+IMPORTS = [
+    'pandas',
+    'okc_analysis.loader',
+    'okc_analysis.cli',
+    'okc_analysis.model',
+    'okc_analysis.render',
+    'okc_analysis.charts',
+    'matplotlib.pyplot',
+    'sklearn.linear_model',
+]
+
+COMMANDS = {
+    'cli_tiers': ['-m', 'okc_analysis', 'tiers', '--workers', '1'],
+    'q1_text': [os.path.join('Part1', 'Part1_Question1.py'), '--text-only'],
+    'q1_chart': [os.path.join('Part1', 'Part1_Question1.py'), '--headless'],
+    'q3_text': [os.path.join('Part1', 'Part1_Question3.py'), '--text-only'],
+    'part2_text': [os.path.join('Part2', 'Part2_Question1.py'), '--text-only'],
+}
+
+IMPORT_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def summarize(timings):
+    return {'best_seconds': min(timings), 'median_seconds': statistics.median(timings)}
+
+
+def time_import(module, repeat, env):
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET.format(module=module, heavy=HEAVY_LIBRARIES)],
+                                cwd=DATA_DIR, env=env, capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output))
+    return {**summarize([run['seconds'] for run in runs]), 'loaded': runs[-1]['loaded']}
+
+
+# Wall time to the first line on stdout and to the exit of the process
+def time_command(args, repeat, env):
+    first_line, total = [], []
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as chart_dir:
+            start = time.perf_counter()
+            process = subprocess.Popen([sys.executable] + args, cwd=DATA_DIR, env=dict(env, OKC_CHART_DIR=chart_dir),
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            process.stdout.readline()
+            first_line.append(time.perf_counter() - start)
+            process.communicate()
+            total.append(time.perf_counter() - start)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, args)
+    return {'first_result': summarize(first_line), 'total': summarize(total)}
+
+
+def run_startup(imports=IMPORTS, commands=COMMANDS, repeat=3):
+    env = dict(os.environ, OKC_HEADLESS='1')
+    for name in ('OKC_TRACE', 'OKC_PROFILE', 'OKC_TEXT_ONLY'):
+        env.pop(name, None)
+
+    results = {'imports': {}, 'commands': {}}
+    for module in imports:
+        results['imports'][module] = stats = time_import(module, repeat, env)
+        print(f"import {module:<22} {stats['best_seconds']:8.3f}s  loads {', '.join(stats['loaded']) or '-'}")
+    for name in commands:
+        results['commands'][name] = stats = time_command(commands[name], repeat, env)
+        print(f"run    {name:<22} {stats['first_result']['best_seconds']:8.3f}s to first output, "
+              f"{stats['total']['best_seconds']:.3f}s total")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time imports and the first result of each analysis')
+    parser.add_argument('--imports', nargs='+', default=IMPORTS)
+    parser.add_argument('--commands', nargs='+', choices=list(COMMANDS), default=list(COMMANDS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write the timings to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = run_startup(args.imports, {name: COMMANDS[name] for name in args.commands}, args.repeat)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, **results}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
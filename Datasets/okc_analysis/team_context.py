@@ -0,0 +1,150 @@
+# Objective:
+# Team context (ratings, record, schedule length) for player rows without merges
+#   - team_stats is laid out once as a dense team x season x column array,
+#     so the team context of every player_stats row (or of a 100x synthetic
+#     history) is one NumPy gather instead of a pd.merge that copies the
+#     whole frame
+#   - Columns: off_rtg, def_rtg, net_rtg, W, L, games, win_pct, and
+#     season_games (the schedule length, the most games any team played)
+#   - Traded players have one row per team; every row gets its own team's
+#     context, and player_season_context() folds those rows into one
+#     games-weighted row per (season, nbapersonid)
+#   - Unknown teams / seasons gather NaN
+#   - season_lengths() is the schedule table behind normalization.season_lengths(),
+#     and team_features() the team context of a player's first N seasons in
+#     the modeling features (features.py)
+#
+# Run `python -m okc_analysis.team_context` from the Datasets folder to compare
+# the gather with the equivalent merge.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+TEAM_COLUMNS = ['off_rtg', 'def_rtg', 'net_rtg', 'W', 'L', 'games', 'win_pct', 'season_games']
+TEAM_FEATURE_COLUMNS = ['team_off_rtg', 'team_def_rtg', 'team_net_rtg', 'team_win_pct']
+
+
+# Weighted mean of each column per integer key, skipping NaN values (one bincount per column)
+def weighted_means(values, weights, keys, columns):
+    uniques, codes = np.unique(keys, return_inverse=True)
+    means = np.full((len(uniques), len(columns)), np.nan)
+    for i in range(len(columns)):
+        known = ~np.isnan(values[:, i])
+        totals = np.bincount(codes[known], weights=weights[known], minlength=len(uniques))
+        sums = np.bincount(codes[known], weights=values[known, i] * weights[known], minlength=len(uniques))
+        np.divide(sums, totals, out=means[:, i], where=totals > 0)
+    return pd.DataFrame(means, index=uniques, columns=columns)
+
+
+class TeamContext:
+    def __init__(self, team_ids, first_season, values):
+        self.team_ids = team_ids
+        self.first_season = first_season
+        self.season_count = values.shape[1] - 1
+        self.columns = {column: i for i, column in enumerate(TEAM_COLUMNS)}
+        self.values = values  # team x season x column, plus a trailing all-NaN team and season
+
+    @classmethod
+    def build(cls, team_stats):
+        team_ids = np.unique(team_stats['nbateamid'].to_numpy('int64'))
+        seasons = team_stats['season'].to_numpy('int64')
+        first_season = int(seasons.min())
+        teams = np.searchsorted(team_ids, team_stats['nbateamid'].to_numpy('int64'))
+        offsets = seasons - first_season
+
+        table = team_stats.assign(win_pct=team_stats['W'] / (team_stats['W'] + team_stats['L']),
+                                  season_games=team_stats.groupby('season')['games'].transform('max'))
+        values = np.full((len(team_ids) + 1, int(seasons.max()) - first_season + 2, len(TEAM_COLUMNS)), np.nan)
+        values[teams, offsets] = table[TEAM_COLUMNS].to_numpy(float)
+        return cls(team_ids, first_season, values)
+
+    # Flat (team, season) slot of each row; the trailing NaN slot where either is unknown
+    def slots(self, team_ids, seasons):
+        team_ids = np.asarray(team_ids, dtype='int64')
+        teams = np.searchsorted(self.team_ids, team_ids).clip(max=len(self.team_ids) - 1)
+        teams[self.team_ids[teams] != team_ids] = len(self.team_ids)
+        offsets = np.asarray(seasons, dtype='int64') - self.first_season
+        offsets[(offsets < 0) | (offsets >= self.season_count)] = self.season_count
+        return teams * (self.season_count + 1) + offsets
+
+    # rows x columns array of the context of each (team, season) pair
+    def gather(self, team_ids, seasons, columns=TEAM_COLUMNS):
+        table = self.values[:, :, [self.columns[column] for column in columns]].reshape(-1, len(columns))
+        return table.take(self.slots(team_ids, seasons), axis=0)
+
+    # team_<column> of every row of the frame (one row per team for traded players), on the
+    # frame's index, to assign or join without copying the frame the way a merge does
+    def row_context(self, frame, columns=TEAM_COLUMNS, prefix='team_'):
+        values = self.gather(frame['nbateamid'].to_numpy('int64'), frame['season'].to_numpy('int64'), columns)
+        return pd.DataFrame(values, index=frame.index, columns=[prefix + column for column in columns])
+
+    # One row per (season, nbapersonid): each team's context weighted by the games played for it
+    def player_season_context(self, player_stats, columns=TEAM_COLUMNS, weight='games'):
+        values = self.gather(player_stats['nbateamid'].to_numpy('int64'), player_stats['season'].to_numpy('int64'),
+                             columns)
+        # (season, nbapersonid) packed into one int64 so the grouping is a plain integer sort
+        keys = player_stats['season'].to_numpy('int64') << 32 | player_stats['nbapersonid'].to_numpy('int64')
+        means = weighted_means(values, player_stats[weight].to_numpy(float), keys, columns)
+        keys = means.index.to_numpy()
+        means.index = pd.MultiIndex.from_arrays([keys >> 32, keys & 0xFFFFFFFF],
+                                                names=['season', 'nbapersonid'])
+        return means
+
+    # Games in each season's schedule (indexed by season)
+    def season_lengths(self):
+        lengths = np.nanmax(self.values[:-1, :-1, self.columns['season_games']], axis=0)
+        seasons = np.arange(self.first_season, self.first_season + self.season_count)
+        known = ~np.isnan(lengths)
+        return pd.Series(lengths[known].astype('int64'), index=pd.Index(seasons[known], name='season'), name='games')
+
+
+# Minutes-weighted team context over each player's first `first_n` seasons after the draft
+def team_features(player_stats, context, first_n=4):
+    early = player_stats[(player_stats['season'] >= player_stats['draftyear']) &
+                         (player_stats['season'] < player_stats['draftyear'] + first_n)]
+    columns = [column.replace('team_', '') for column in TEAM_FEATURE_COLUMNS]
+    values = context.gather(early['nbateamid'].to_numpy('int64'), early['season'].to_numpy('int64'), columns)
+    means = weighted_means(values, early['mins'].to_numpy(float), early['nbapersonid'].to_numpy('int64'),
+                           TEAM_FEATURE_COLUMNS)
+    return means.rename_axis('nbapersonid').astype('float32')
+
+
+# Built once per process for the team_stats.csv in data_dir
+@lru_cache(maxsize=None)
+def load_team_context(data_dir=None):
+    from okc_analysis.loader import load_dataset
+    return TeamContext.build(load_dataset('team_stats', data_dir=data_dir))
+
+
+if __name__ == '__main__':
+    import timeit
+
+    from okc_analysis.loader import load_datasets
+    from okc_analysis.normalization import season_lengths
+
+    player_stats, team_stats = load_datasets('player_stats', 'team_stats')
+    context = load_team_context()
+    merge_columns = ['nbateamid', 'season', 'off_rtg', 'def_rtg', 'net_rtg', 'W', 'L']
+
+    def timed(label, query, number=20):
+        seconds = timeit.timeit(query, number=number) / number
+        print(f"{label:<50} {seconds * 1e3:9.2f} ms")
+        return query()
+
+    print(f"------- Team context for {len(player_stats)} player rows -------\n")
+    gathered = timed("Gather (dense team x season lookup)", lambda: context.row_context(player_stats))
+    merged = timed("pd.merge on (nbateamid, season)", lambda: player_stats.merge(
+        team_stats[merge_columns], on=['nbateamid', 'season'], how='left', suffixes=('', '_team')))
+    per_player = timed("Games-weighted context per player-season", lambda: context.player_season_context(player_stats))
+
+    assert np.allclose(gathered['team_net_rtg'], merged['net_rtg'], equal_nan=True)
+    assert context.season_lengths().equals(season_lengths(team_stats))
+    traded = player_stats[player_stats.duplicated(['season', 'nbapersonid'], keep=False)]
+    print(f"\n{len(player_stats)} rows ({len(traded)} of them traded player-seasons) folded into {len(per_player)}, e.g.")
+    example = traded.iloc[0]
+    rows = traded[(traded['season'] == example['season']) & (traded['nbapersonid'] == example['nbapersonid'])]
+    rows = rows[['player', 'season', 'team', 'games']].join(context.row_context(rows, ['net_rtg', 'win_pct']))
+    print(rows.to_string(index=False))
+    print(per_player.loc[(example['season'], example['nbapersonid']), ['net_rtg', 'win_pct']].round(3).to_string())
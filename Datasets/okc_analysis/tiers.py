@@ -0,0 +1,60 @@
+# Objective:
+# Per-season totals of any counting stats for any award tiers
+#   - Join awards to stats once on (season, nbapersonid), so only the
+#     seasons a player actually earned the award count toward that tier
+#   - Reshape the tier flags into one (season, tier) key and aggregate
+#     every requested stat in a single groupby
+#   - Adding a tier or a stat doesn't add another scan of player_stats
+
+import pandas as pd
+
+# Tier label -> award flag column in awards_data
+SCORING_TIERS = {
+    'All Star': 'all_star_game',
+    '1st Team': 'All NBA First Team',
+    '2nd Team': 'All NBA Second Team',
+    '3rd Team': 'All NBA Third Team',
+}
+
+
+# Stats of every player in each tier, one row per (season, tier, nbapersonid)
+# (a traded player's team rows are summed into one row)
+def tier_player_seasons(player_stats, awards_data, stats=('points', 'games'), tiers=None,
+                        first_season=None, last_season=None):
+    tiers = tiers or SCORING_TIERS
+    stats = list(stats)
+    keys = ['season', 'nbapersonid']
+
+    # A few players have two awards rows in the same season, so collapse the
+    # flags per player-season before joining to avoid counting their stats twice
+    flags = awards_data[keys + list(tiers.values())].dropna(subset=['nbapersonid'])
+    flags = flags.groupby(keys).any().rename(columns={column: tier for tier, column in tiers.items()})
+
+    stats_rows = player_stats[keys + stats]
+    if first_season is not None:
+        stats_rows = stats_rows[stats_rows['season'] >= first_season]
+    if last_season is not None:
+        stats_rows = stats_rows[stats_rows['season'] <= last_season]
+    merged = stats_rows.join(flags, on=keys, how='inner')
+
+    long = merged.melt(id_vars=keys + stats, value_vars=list(tiers), var_name='tier', value_name='selected')
+    long = long[long['selected']]
+    return long.groupby(['season', 'tier', 'nbapersonid'])[stats].sum()
+
+
+# Sum the stats of every player-season in each tier, one row per (season, tier)
+def tier_season_totals(player_stats, awards_data, stats=('points', 'games'), tiers=None,
+                       first_season=None, last_season=None):
+    players = tier_player_seasons(player_stats, awards_data, list(stats), tiers, first_season, last_season)
+    totals = players.groupby(level=['season', 'tier']).sum()
+    return totals.reindex(columns=list(stats))
+
+
+# Divide season totals by games played, e.g. points per game for every tier.
+# Returns one row per season and one column per tier for each stat.
+def tier_per_game(totals, stats=('points',), tiers=None, games='games'):
+    per_game = totals[list(stats)].div(totals[games], axis=0)
+    per_game = per_game.unstack('tier')
+    if tiers is not None:
+        per_game = per_game.reindex(columns=pd.MultiIndex.from_product([list(stats), list(tiers)]))
+    return per_game